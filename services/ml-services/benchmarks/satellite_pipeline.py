@@ -0,0 +1,298 @@
+"""
+Satellite Pipeline Benchmarks
+Reproducible per-stage timings for SatelliteDataProcessor on synthetic scenes
+
+Run from services/ml-services:
+
+    python -m benchmarks.satellite_pipeline --sizes 1024 2048 --output bench.json
+    python -m benchmarks.satellite_pipeline --sizes 1024 2048 --compare bench.json
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from shapely.geometry import Polygon, mapping, shape
+
+from src.processors.satellite_processor import SatelliteDataProcessor
+from src.processors.vegetation_indices import ParallelIndexEngine
+
+logger = logging.getLogger(__name__)
+
+SERIALISATION_FORMATS = ['list', 'rle', 'png', 'npy']
+
+
+def make_scene(path: str, size: int, bands: int = 6, block_size: int = 256, seed: int = 0) -> str:
+    """Write a tiled uint16 GeoTIFF whose bands follow a smooth synthetic vegetation field."""
+    rng = np.random.default_rng(seed)
+    rows, cols = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    # Low-frequency canopy pattern in [0, 1] plus pixel noise
+    vigour = 0.5 + 0.25 * np.sin(6 * rows + rng.uniform(0, 6)) + 0.25 * np.cos(5 * cols + rng.uniform(0, 6))
+    vigour = np.clip(vigour + rng.normal(0, 0.05, vigour.shape).astype(np.float32), 0, 1)
+
+    # Reflectance x 10000 for [B, G, R, NIR, SWIR1, SWIR2]
+    profiles = [(600, -300), (900, 200), (1500, -1100), (2000, 3500), (2500, -800), (1800, -900)]
+    with rasterio.open(
+        path, 'w', driver='GTiff', height=size, width=size, count=bands, dtype='uint16',
+        crs='EPSG:32643', transform=from_origin(500000, 2000000, 10, 10),
+        tiled=True, blockxsize=block_size, blockysize=block_size, compress='deflate'
+    ) as dst:
+        for band in range(bands):
+            base, slope = profiles[band % len(profiles)]
+            values = base + slope * vigour + rng.normal(0, 50, vigour.shape)
+            dst.write(np.clip(values, 1, 10000).astype(np.uint16), band + 1)
+    return path
+
+
+def make_farm_polygon(size: int, fraction: float = 0.5, vertices: int = 24, seed: int = 0) -> Dict[str, Any]:
+    """Irregular polygon centred on the scene spanning about ``fraction`` of its width."""
+    rng = np.random.default_rng(seed)
+    centre_x, centre_y = 500000 + size * 5, 2000000 - size * 5
+    radius = size * 10 * fraction / 2
+    angles = np.sort(rng.uniform(0, 2 * np.pi, vertices))
+    radii = radius * rng.uniform(0.7, 1.0, vertices)
+    polygon = Polygon(zip(centre_x + radii * np.cos(angles), centre_y + radii * np.sin(angles)))
+    return mapping(polygon.buffer(0))
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's RSS high-water mark (Linux only)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as handle:
+            handle.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open('/proc/self/status') as handle:
+            for line in handle:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(stage: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Wall-clock timings over ``repeat`` runs, then one traced run for RSS and allocations."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        stage()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    rss_reset = _reset_peak_rss()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    stage()
+    after = tracemalloc.take_snapshot()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated = [stat for stat in after.compare_to(before, 'lineno') if stat.size_diff > 0]
+
+    return {
+        'seconds': timings,
+        'median_seconds': float(np.median(timings)),
+        'min_seconds': float(np.min(timings)),
+        'peak_rss_mb': _peak_rss_mb(),
+        'peak_rss_scope': 'stage' if rss_reset else 'process',
+        'traced_peak_mb': traced_peak / 1024 ** 2,
+        'retained_allocation_blocks': int(sum(stat.count_diff for stat in allocated)),
+    }
+
+
+def run_benchmarks(sizes: List[int], bands: int, farm_fraction: float, repeat: int,
+                   workdir: str, seed: int = 0) -> List[Dict[str, Any]]:
+    """Time clip, indices, health, zones and serialisation stages for each scene size."""
+    processor = SatelliteDataProcessor({
+        'executor': {'cpu_backend': 'thread'},
+        'catalog': {'path': str(Path(workdir) / 'scene_catalog.sqlite')},
+    })
+    results = []
+
+    try:
+        for size in sizes:
+            image_path = make_scene(str(Path(workdir) / f'scene_{size}.tif'), size, bands, seed=seed)
+            farm_boundary = make_farm_polygon(size, farm_fraction, seed=seed)
+            boundary_geom = shape(farm_boundary)
+
+            scene = processor._read_clipped_scene(image_path, boundary_geom)
+            image, valid = scene['bands'], scene['valid']
+            indices = processor._calculate_vegetation_indices(valid.compress(image))
+            zones = SatelliteDataProcessor._generate_management_zones(indices, valid)
+            megapixels = image.shape[1] * image.shape[2] / 1e6
+
+            stages: Dict[str, Callable[[], Any]] = {
+                'clip': lambda: processor._read_clipped_scene(image_path, boundary_geom),
+                'indices': lambda: processor._calculate_vegetation_indices(valid.compress(image)),
+                'health': lambda: SatelliteDataProcessor._analyze_crop_health(indices),
+                'zones': lambda: SatelliteDataProcessor._generate_management_zones(indices, valid),
+                'tiled_summary': lambda: processor._summarize_scene_tiled(image_path, boundary_geom),
+            }
+            for fmt in SERIALISATION_FORMATS:
+                stages[f'serialise_{fmt}'] = (
+                    lambda fmt=fmt: SatelliteDataProcessor._encode_outputs(
+                        indices, zones, fmt, scene['meta'], str(Path(workdir) / f'cog_{size}'), valid
+                    )
+                )
+
+            for name, stage in stages.items():
+                metrics = measure(stage, repeat)
+                metrics.update({
+                    'scene_size': size,
+                    'stage': name,
+                    'megapixels': megapixels,
+                    'valid_fraction': valid.count / (image.shape[1] * image.shape[2]),
+                    'megapixels_per_second': megapixels / metrics['median_seconds'],
+                })
+                results.append(metrics)
+                logger.info(f"{size:>6} {name:<16} {metrics['median_seconds'] * 1000:9.1f} ms "
+                            f"{metrics['megapixels_per_second']:8.1f} MP/s "
+                            f"{metrics['traced_peak_mb']:8.1f} MB traced")
+    finally:
+        processor.shutdown()
+    return results
+
+
+def run_index_scaling(sizes: List[int], bands: int, workers: List[int], repeat: int,
+                      workdir: str, seed: int = 0) -> List[Dict[str, Any]]:
+    """Time stripe-parallel index computation on whole (unclipped) scenes for each worker count."""
+    results = []
+    for size in sizes:
+        image_path = str(Path(workdir) / f'scene_{size}.tif')
+        if not Path(image_path).exists():
+            make_scene(image_path, size, bands, seed=seed)
+        with rasterio.open(image_path) as src:
+            image = src.read()
+        megapixels = size * size / 1e6
+
+        serial_seconds = None
+        for count in workers:
+            engine = ParallelIndexEngine(workers=count, min_pixels=0)
+            try:
+                metrics = measure(lambda: engine.compute(image), repeat)
+            finally:
+                engine.shutdown()
+            serial_seconds = serial_seconds or metrics['median_seconds']
+            metrics.update({
+                'scene_size': size,
+                'stage': f'indices_parallel_{count}',
+                'workers': count,
+                'megapixels': megapixels,
+                'megapixels_per_second': megapixels / metrics['median_seconds'],
+                'speedup': serial_seconds / metrics['median_seconds'],
+            })
+            results.append(metrics)
+            logger.info(f"{size:>6} {metrics['stage']:<16} {metrics['median_seconds'] * 1000:9.1f} ms "
+                        f"{metrics['megapixels_per_second']:8.1f} MP/s {metrics['speedup']:6.2f}x")
+    return results
+
+
+def environment_metadata(args: argparse.Namespace) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'rasterio': rasterio.__version__,
+        'parameters': {
+            'sizes': args.sizes,
+            'bands': args.bands,
+            'farm_fraction': args.farm_fraction,
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'index_workers': args.index_workers,
+        },
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, max_regression: float) -> List[str]:
+    """Stages whose best time regressed by more than ``max_regression`` against a baseline.
+
+    Minimum times are compared because they are the least sensitive to noise from
+    other processes.
+    """
+    baseline = json.loads(Path(baseline_path).read_text())
+    reference = {(item['scene_size'], item['stage']): item for item in baseline['results']}
+    regressions = []
+    for item in results:
+        previous = reference.get((item['scene_size'], item['stage']))
+        if previous is None:
+            continue
+        ratio = item['min_seconds'] / previous['min_seconds']
+        logger.info(f"{item['scene_size']:>6} {item['stage']:<16} {ratio:6.2f}x vs baseline")
+        if ratio > 1 + max_regression:
+            regressions.append(f"{item['stage']}@{item['scene_size']}: {ratio:.2f}x slower")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1024, 2048], help='scene edge lengths in pixels')
+    parser.add_argument('--bands', type=int, default=6)
+    parser.add_argument('--farm-fraction', type=float, default=0.5, help='farm width as a fraction of the scene')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--index-workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+                        help='worker counts for the parallel index scaling stage (first is the baseline)')
+    parser.add_argument('--workdir', help='directory for synthetic scenes (default: a temporary directory)')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    parser.add_argument('--compare', help='baseline JSON to compare best timings against')
+    parser.add_argument('--max-regression', type=float, default=0.1,
+                        help='allowed slowdown fraction before --compare fails')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    with tempfile.TemporaryDirectory() as temporary:
+        workdir = args.workdir or temporary
+        Path(workdir).mkdir(parents=True, exist_ok=True)
+        results = run_benchmarks(args.sizes, args.bands, args.farm_fraction, args.repeat, workdir, args.seed)
+        results += run_index_scaling(args.sizes, args.bands, args.index_workers, args.repeat, workdir, args.seed)
+
+    report = {'metadata': environment_metadata(args), 'results': results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        logger.info(f"Results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.max_regression)
+        if regressions:
+            logger.error("Performance regressions: " + '; '.join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
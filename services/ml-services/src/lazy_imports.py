@@ -0,0 +1,60 @@
+"""
+Lazy Imports
+Deferred loading of heavy optional backends until first attribute access
+"""
+
+import importlib
+import threading
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule(ModuleType):
+    """Module proxy that imports ``name`` (optionally taking ``attribute`` from it) on first use.
+
+    ``keras = LazyModule('tensorflow', 'keras')`` behaves like ``from tensorflow import
+    keras`` but only pays for the TensorFlow import when ``keras`` is first touched. A
+    missing package raises ImportError at that point rather than at module import.
+    """
+
+    def __init__(self, name: str, attribute: Optional[str] = None):
+        super().__init__(f'{name}.{attribute}' if attribute else name)
+        self.__dict__['_lazy_target'] = (name, attribute)
+        self.__dict__['_lazy_module'] = None
+        self.__dict__['_lazy_lock'] = threading.Lock()
+
+    def _load(self) -> Any:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    name, attribute = self.__dict__['_lazy_target']
+                    module = importlib.import_module(name)
+                    if attribute:
+                        module = getattr(module, attribute)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__['_lazy_module'] is not None
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._load(), item)
+
+    def __setattr__(self, item: str, value: Any):
+        setattr(self._load(), item, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        name, attribute = self.__dict__['_lazy_target']
+        state = 'loaded' if self.is_loaded else 'not loaded'
+        return f"<lazy module '{name}{'.' + attribute if attribute else ''}' ({state})>"
+
+
+def lazy_import(name: str, attribute: Optional[str] = None) -> LazyModule:
+    """Return a proxy for ``import name`` (or ``from name import attribute``)."""
+    return LazyModule(name, attribute)
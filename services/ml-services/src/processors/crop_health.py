@@ -0,0 +1,131 @@
+"""
+Crop Health Statistics
+Single-pass, histogram-based NDVI health statistics that can be merged across chunks
+"""
+
+import numpy as np
+from typing import Any, Dict, Optional
+
+# NDVI thresholds: zones are stressed < 'stressed' <= moderate < 'moderate' <= good <
+# 'good' <= excellent; coverage counts NDVI > 'vegetated', healthy counts NDVI > 'healthy'.
+DEFAULT_HEALTH_THRESHOLDS = {
+    'stressed': 0.2,
+    'moderate': 0.4,
+    'good': 0.6,
+    'vegetated': 0.3,
+    'healthy': 0.6,
+}
+
+HEALTH_ZONES = ['stressed', 'moderate', 'good', 'excellent']
+
+
+def resolve_health_thresholds(config: Dict[str, Any], crop_type: Optional[str] = None) -> Dict[str, float]:
+    """Thresholds for a crop type from the ``health.thresholds`` config, over the defaults."""
+    configured = config.get('thresholds', {})
+    thresholds = dict(DEFAULT_HEALTH_THRESHOLDS)
+    thresholds.update(configured.get('default', {}))
+    if crop_type:
+        thresholds.update(configured.get(crop_type, {}))
+    return thresholds
+
+
+class HealthStatistics:
+    """Histogram accumulator for NDVI health metrics, optionally per group (e.g. farm).
+
+    NDVI is binned once with ``np.digitize`` on the union of all threshold edges and
+    reduced with ``np.bincount``; zone, coverage and healthy-area counts as well as
+    means and variances are then derived from the per-bin totals. Accumulators for
+    chunks or windows can be merged.
+    """
+
+    def __init__(self, thresholds: Optional[Dict[str, float]] = None, n_groups: int = 1,
+                 dtype=np.float32):
+        self.thresholds = dict(DEFAULT_HEALTH_THRESHOLDS, **(thresholds or {}))
+        self.n_groups = n_groups
+        self.dtype = np.dtype(dtype)
+
+        # Zone edges are left-closed; strict '>' thresholds use the next representable value
+        t = {key: self.dtype.type(value) for key, value in self.thresholds.items()}
+        self._zone_edges = [t['stressed'], t['moderate'], t['good']]
+        self._vegetated_edge = np.nextafter(t['vegetated'], self.dtype.type(np.inf))
+        self._healthy_edge = np.nextafter(t['healthy'], self.dtype.type(np.inf))
+        self.edges = np.unique(np.array(
+            self._zone_edges + [self._vegetated_edge, self._healthy_edge], dtype=self.dtype
+        ))
+
+        n_bins = len(self.edges) + 1
+        self.counts = np.zeros((n_groups, n_bins), dtype=np.int64)
+        self.sums = np.zeros((n_groups, n_bins), dtype=np.float64)
+        self.sums_sq = np.zeros((n_groups, n_bins), dtype=np.float64)
+        self.invalid = np.zeros(n_groups, dtype=np.int64)
+
+    def update(self, ndvi: np.ndarray, groups: Optional[np.ndarray] = None):
+        """Accumulate a chunk of NDVI values (optionally labelled with group ids)."""
+        ndvi = np.asarray(ndvi).ravel()
+        groups = np.zeros(ndvi.size, dtype=np.int64) if groups is None else np.asarray(groups).ravel()
+
+        finite = np.isfinite(ndvi)
+        if not finite.all():
+            self.invalid += np.bincount(groups[~finite], minlength=self.n_groups)
+            ndvi, groups = ndvi[finite], groups[finite]
+
+        n_bins = self.counts.shape[1]
+        flat_bins = groups * n_bins + np.digitize(ndvi.astype(self.dtype, copy=False), self.edges)
+        size = self.n_groups * n_bins
+        values = ndvi.astype(np.float64)
+
+        self.counts += np.bincount(flat_bins, minlength=size).reshape(self.counts.shape)
+        self.sums += np.bincount(flat_bins, weights=values, minlength=size).reshape(self.sums.shape)
+        self.sums_sq += np.bincount(flat_bins, weights=values * values, minlength=size).reshape(self.sums_sq.shape)
+
+    def merge(self, other: 'HealthStatistics'):
+        self.counts += other.counts
+        self.sums += other.sums
+        self.sums_sq += other.sums_sq
+        self.invalid += other.invalid
+
+    def _bins_from(self, edge) -> slice:
+        """Bins whose values are >= edge."""
+        return slice(int(np.searchsorted(self.edges, edge)) + 1, None)
+
+    def _bins_below(self, edge) -> slice:
+        return slice(0, int(np.searchsorted(self.edges, edge)) + 1)
+
+    def summary(self, group: int = 0) -> Dict[str, Any]:
+        """Counts, coverage percentages, mean and variance for one group."""
+        counts, sums, sums_sq = self.counts[group], self.sums[group], self.sums_sq[group]
+        valid = int(counts.sum())
+        total = max(valid + int(self.invalid[group]), 1)
+
+        mean = float(sums.sum() / valid) if valid else 0.0
+        variance = float(max(sums_sq.sum() / valid - mean ** 2, 0.0)) if valid else 0.0
+
+        zone_bins = [
+            self._bins_below(self._zone_edges[0]),
+            slice(self._bins_from(self._zone_edges[0]).start, self._bins_below(self._zone_edges[1]).stop),
+            slice(self._bins_from(self._zone_edges[1]).start, self._bins_below(self._zone_edges[2]).stop),
+            self._bins_from(self._zone_edges[2]),
+        ]
+
+        zones = {}
+        for zone_name, bins in zip(HEALTH_ZONES, zone_bins):
+            zone_count = int(counts[bins].sum())
+            zone_mean = float(sums[bins].sum() / zone_count) if zone_count else 0.0
+            zones[zone_name] = {
+                'pixel_count': zone_count,
+                'percentage': float(zone_count / total * 100),
+                'mean_ndvi': zone_mean,
+                'variance': float(max(sums_sq[bins].sum() / zone_count - zone_mean ** 2, 0.0)) if zone_count else 0.0
+            }
+
+        return {
+            'pixel_count': valid,
+            'total_pixels': total,
+            'mean': mean,
+            'variance': variance,
+            'std': float(np.sqrt(variance)),
+            'vegetation_coverage': float(counts[self._bins_from(self._vegetated_edge)].sum() / total * 100),
+            'healthy_areas': float(counts[self._bins_from(self._healthy_edge)].sum() / total * 100),
+            'stressed_areas': zones['stressed']['percentage'],
+            'zones': zones
+        }
@@ -0,0 +1,101 @@
+"""
+Pipeline Executors
+Run blocking raster I/O and CPU-bound numeric stages off the asyncio event loop
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineExecutor:
+    """Thread pool for I/O stages and process (or thread) pool for CPU stages.
+
+    Each pool admits at most ``max_queue_depth`` submitted-but-unfinished tasks;
+    further callers wait on the event loop instead of piling work into the pool.
+    Pools are created lazily so constructing a processor stays cheap.
+    """
+
+    def __init__(self, io_workers: int = 4, cpu_workers: Optional[int] = None,
+                 cpu_backend: str = 'process', max_queue_depth: Optional[int] = None,
+                 mp_context: str = 'spawn'):
+        if cpu_backend not in ('process', 'thread'):
+            raise ValueError(f"Unsupported cpu_backend: {cpu_backend}")
+
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.cpu_backend = cpu_backend
+        self.max_queue_depth = max_queue_depth or 2 * (self.io_workers + self.cpu_workers)
+        self.mp_context = mp_context
+
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        self._cpu_pool: Optional[Executor] = None
+        # Semaphores are bound to the loop they are used on
+        self._limits: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]' = \
+            weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'PipelineExecutor':
+        """Build an executor from the ``executor`` section of the processor config."""
+        return cls(
+            io_workers=config.get('io_workers', 4),
+            cpu_workers=config.get('cpu_workers'),
+            cpu_backend=config.get('cpu_backend', 'process'),
+            max_queue_depth=config.get('max_queue_depth'),
+            mp_context=config.get('mp_context', 'spawn')
+        )
+
+    @property
+    def io_pool(self) -> ThreadPoolExecutor:
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='satellite-io')
+        return self._io_pool
+
+    @property
+    def cpu_pool(self) -> Executor:
+        if self._cpu_pool is None:
+            if self.cpu_backend == 'process':
+                self._cpu_pool = ProcessPoolExecutor(
+                    max_workers=self.cpu_workers,
+                    mp_context=multiprocessing.get_context(self.mp_context)
+                )
+            else:
+                self._cpu_pool = ThreadPoolExecutor(max_workers=self.cpu_workers, thread_name_prefix='satellite-cpu')
+        return self._cpu_pool
+
+    def _limit(self, kind: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        limits = self._limits.get(loop)
+        if limits is None:
+            limits = self._limits[loop] = {
+                'io': asyncio.Semaphore(self.max_queue_depth),
+                'cpu': asyncio.Semaphore(self.max_queue_depth)
+            }
+        return limits[kind]
+
+    async def _run(self, kind: str, pool: Executor, fn: Callable, *args, **kwargs) -> Any:
+        async with self._limit(kind):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, partial(fn, *args, **kwargs))
+
+    async def run_io(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking I/O callable (raster reads, clipping) in the thread pool."""
+        return await self._run('io', self.io_pool, fn, *args, **kwargs)
+
+    async def run_cpu(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a CPU-bound callable in the CPU pool; fn and its arguments must be picklable."""
+        return await self._run('cpu', self.cpu_pool, fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        for pool in (self._io_pool, self._cpu_pool):
+            if pool is not None:
+                pool.shutdown(wait=wait)
+        self._io_pool = None
+        self._cpu_pool = None
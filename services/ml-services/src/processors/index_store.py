@@ -0,0 +1,120 @@
+"""
+Index Raster Store
+Persisted per-farm vegetation index stacks as Cloud-Optimized GeoTIFFs
+"""
+
+import hashlib
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import rasterio
+from rasterio.errors import RasterioIOError
+from rasterio.windows import Window
+
+from src.processors.raster_encoding import write_cog
+from src.processors.vegetation_indices import INDEX_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+class IndexRasterStore:
+    """Stores the index stack of a clipped scene as one multi-band COG per (scene, boundary).
+
+    Files are named after the scene version, boundary hash and ``INDEX_VERSION`` and
+    carry the same values as GeoTIFF tags, so a changed scene, boundary or index formula
+    never matches an old file. Each band is described by its index name; reads can
+    target a window and an overview level, so trend, comparison and tile requests do
+    not go back to the raw bands.
+    """
+
+    def __init__(self, root: str = 'data/index_rasters'):
+        self.root = Path(root)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'IndexRasterStore':
+        """Build a store from the ``index_store`` section of the processor config."""
+        return cls(root=config.get('root', 'data/index_rasters'))
+
+    @staticmethod
+    def tags_for(scene_key: Tuple, n_bands: int, names: Sequence[str]) -> Dict[str, Any]:
+        """Provenance tags for a scene key as built by ``SceneCache.scene_key``."""
+        source, version, size, boundary_hash = scene_key[:4]
+        return {
+            'source_scene': source,
+            # mtime:size for local files, the object ETag for remote ones
+            'source_version': f'{version}:{size}' if size is not None else str(version),
+            'boundary_hash': boundary_hash,
+            'index_version': INDEX_VERSION,
+            'source_band_count': n_bands,
+            'indices': ','.join(names),
+        }
+
+    def path_for(self, scene_key: Tuple) -> Path:
+        digest = hashlib.sha1(repr(scene_key[:4] + (INDEX_VERSION,)).encode()).hexdigest()[:24]
+        return self.root / f'{digest}.tif'
+
+    def lookup(self, scene_key: Tuple) -> Optional[Dict[str, Any]]:
+        """Tags of the stored raster for a scene key, or None if absent or stale."""
+        path = self.path_for(scene_key)
+        if not path.exists():
+            return None
+        try:
+            with rasterio.open(path) as src:
+                tags = src.tags()
+        except RasterioIOError as e:
+            logger.warning(f"Ignoring unreadable index raster {path}: {e}")
+            return None
+
+        expected = self.tags_for(scene_key, 0, [])
+        if any(tags.get(key) != str(expected[key])
+               for key in ('source_scene', 'source_version', 'boundary_hash', 'index_version')):
+            return None
+        return {
+            'path': str(path),
+            'indices': tags.get('indices', '').split(','),
+            'source_band_count': int(tags.get('source_band_count', 0)),
+        }
+
+    def write(self, scene_key: Tuple, indices: Dict[str, np.ndarray], meta: Dict[str, Any],
+              n_bands: int) -> str:
+        """Persist an index stack; the file appears atomically under its final name."""
+        names = list(indices)
+        path = self.path_for(scene_key)
+        temporary = path.with_name(f'.{path.stem}.{uuid.uuid4().hex}.tif')
+        stack = np.stack([np.asarray(indices[name], dtype=np.float32) for name in names])
+        try:
+            write_cog(str(temporary), stack, meta, nodata=np.nan,
+                      tags=self.tags_for(scene_key, n_bands, names), band_names=names)
+            os.replace(temporary, path)
+        finally:
+            if temporary.exists():
+                temporary.unlink()
+        return str(path)
+
+    def read(self, path: str, names: Optional[Sequence[str]] = None, window: Optional[Window] = None,
+             overview_level: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Read stored indices, optionally a window (in full-resolution pixels) of an overview."""
+        # Band descriptions are only exposed on the full-resolution dataset
+        with rasterio.open(path) as src:
+            band_names: List[str] = list(src.descriptions)
+            full_width, full_height = src.width, src.height
+        names = band_names if names is None else list(names)
+        missing = [name for name in names if name not in band_names]
+        if missing:
+            raise KeyError(f"Index raster {path} has no band(s) {missing}")
+
+        open_options = {} if overview_level is None else {'overview_level': overview_level}
+        with rasterio.open(path, **open_options) as src:
+            if window is not None and overview_level is not None:
+                # Windows are given at full resolution; scale them onto the overview grid
+                x_scale, y_scale = src.width / full_width, src.height / full_height
+                window = Window(window.col_off * x_scale, window.row_off * y_scale,
+                                window.width * x_scale, window.height * y_scale).round_offsets().round_lengths()
+
+            bands = [band_names.index(name) + 1 for name in names]
+            data = src.read(bands, window=window)
+        return dict(zip(names, data))
@@ -0,0 +1,119 @@
+"""
+Management Zone Engine
+Sample-fitted clustering of vegetation index features with chunked label assignment
+"""
+
+import numpy as np
+from typing import Any, Dict, Optional
+
+from src.processors.streaming_stats import GroupedStatistics
+
+# NDVI bin edges used to stratify the fitting sample
+STRATA_EDGES = np.linspace(-1, 1, 11)[1:-1]
+
+
+class ManagementZoneEngine:
+    """Clusters pixels into management zones without fitting on every pixel.
+
+    The scaler and k-means model are fitted on an NDVI-stratified sample of at most
+    ``sample_size`` pixels (every stratum keeps at least ``min_per_stratum`` pixels so
+    small stressed patches still shape the centres). Labels for the full raster are
+    then assigned in chunks of ``chunk_size`` pixels.
+    """
+
+    def __init__(self, max_zones: int = 5, sample_size: int = 50000, chunk_size: int = 500000,
+                 algorithm: str = 'kmeans', min_per_stratum: int = 200, random_state: int = 42):
+        if algorithm not in ('kmeans', 'minibatch'):
+            raise ValueError(f"Unsupported zone clustering algorithm: {algorithm}")
+
+        self.max_zones = max_zones
+        self.sample_size = sample_size
+        self.chunk_size = chunk_size
+        self.algorithm = algorithm
+        self.min_per_stratum = min_per_stratum
+        self.random_state = random_state
+
+        self.n_zones: Optional[int] = None
+        self.scaler = None
+        self.model = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'ManagementZoneEngine':
+        """Build an engine from the ``zones`` section of the processor config."""
+        return cls(
+            max_zones=config.get('max_zones', 5),
+            sample_size=config.get('sample_size', 50000),
+            chunk_size=config.get('chunk_size', 500000),
+            algorithm=config.get('algorithm', 'kmeans'),
+            min_per_stratum=config.get('min_per_stratum', 200),
+            random_state=config.get('random_state', 42)
+        )
+
+    def n_zones_for(self, n_valid: int) -> int:
+        """Adaptive number of zones for a given count of valid pixels."""
+        return min(self.max_zones, max(2, n_valid // 100))
+
+    def sample(self, features: np.ndarray, sampling_rate: Optional[float] = None) -> np.ndarray:
+        """Row indices of an NDVI-stratified sample (NDVI is the first feature column)."""
+        n_rows = features.shape[0]
+        rate = sampling_rate if sampling_rate is not None else self.sample_size / max(n_rows, 1)
+        if rate >= 1:
+            return np.arange(n_rows)
+
+        rng = np.random.default_rng(self.random_state)
+        strata = np.digitize(features[:, 0], STRATA_EDGES)
+        order = np.argsort(strata, kind='stable')
+        counts = np.bincount(strata, minlength=len(STRATA_EDGES) + 1)
+
+        selected = []
+        start = 0
+        for count in counts:
+            if count:
+                quota = min(count, max(self.min_per_stratum, int(round(count * rate))))
+                members = order[start:start + count]
+                selected.append(members if quota == count else rng.choice(members, quota, replace=False))
+            start += count
+
+        return np.sort(np.concatenate(selected))
+
+    def fit(self, sample_features: np.ndarray, n_valid: Optional[int] = None) -> 'ManagementZoneEngine':
+        """Fit scaler and clustering on sample features; n_valid sizes the zone count."""
+        # scikit-learn is only needed once zones are actually fitted
+        from sklearn.cluster import KMeans, MiniBatchKMeans
+        from sklearn.preprocessing import StandardScaler
+
+        self.n_zones = self.n_zones_for(n_valid if n_valid is not None else len(sample_features))
+
+        if len(sample_features) > self.sample_size:
+            sample_features = sample_features[self.sample(sample_features)]
+
+        self.scaler = StandardScaler().fit(sample_features)
+        normalized = self.scaler.transform(sample_features)
+
+        if self.algorithm == 'minibatch':
+            self.model = MiniBatchKMeans(n_clusters=self.n_zones, random_state=self.random_state,
+                                         batch_size=4096, n_init=3)
+        else:
+            self.model = KMeans(n_clusters=self.n_zones, random_state=self.random_state)
+        self.model.fit(normalized)
+        return self
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Assign zone labels chunk by chunk to bound the size of normalised copies."""
+        labels = np.empty(features.shape[0], dtype=np.int32)
+        for start in range(0, features.shape[0], self.chunk_size):
+            chunk = features[start:start + self.chunk_size]
+            labels[start:start + self.chunk_size] = self.model.predict(self.scaler.transform(chunk))
+        return labels
+
+    def zone_statistics(self, labels: np.ndarray, index_values: Dict[str, np.ndarray],
+                        stats: Optional[Dict[str, GroupedStatistics]] = None) -> Dict[str, GroupedStatistics]:
+        """Grouped mean/std/min/max for every index in one bincount pass per index.
+
+        ``index_values`` holds 1-D values aligned with ``labels``; pass ``stats`` to
+        accumulate across chunks or windows.
+        """
+        stats = stats if stats is not None else {}
+        for key, values in index_values.items():
+            stats.setdefault(key, GroupedStatistics(self.n_zones)).update(labels, values)
+        return stats
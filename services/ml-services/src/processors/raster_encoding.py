@@ -0,0 +1,245 @@
+"""
+Raster Encoding
+Compact response encodings for zone maps and index rasters
+"""
+
+import base64
+import io
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 'list' is the legacy nested-list encoding and is kept for backwards compatibility
+RASTER_FORMATS = ('list', 'rle', 'png', 'npy', 'cog')
+
+# Used when neither the caller nor the Accept header picks a format
+DEFAULT_RASTER_FORMAT = 'rle'
+
+# Accept header media types understood by negotiate_raster_format
+MEDIA_TYPE_FORMATS = {
+    'application/vnd.krishimitra.rle+json': 'rle',
+    'image/png': 'png',
+    'application/x-npy': 'npy',
+    'image/tiff; application=geotiff; profile=cloud-optimized': 'cog',
+    'application/json': 'list',
+}
+
+
+def _parse_media_type(media_type: str) -> Tuple[str, Dict[str, str]]:
+    """Split ``type/subtype; key=value`` into the lower-cased type and its parameters."""
+    name, *params = media_type.split(';')
+    parsed = {}
+    for param in params:
+        key, _, value = param.partition('=')
+        if key.strip():
+            parsed[key.strip().lower()] = value.strip().strip('"').lower()
+    return name.strip().lower(), parsed
+
+
+def _parse_accept(accept: Optional[str]) -> List[Tuple[str, Dict[str, str], float]]:
+    """Media ranges of an Accept header as (type, parameters, q) in header order.
+
+    Ranges with a malformed q-value are dropped.
+    """
+    ranges = []
+    for media_range in (accept or '').split(','):
+        media_type, params = _parse_media_type(media_range)
+        if '/' not in media_type:
+            continue
+        try:
+            q = float(params.pop('q', 1))
+        except ValueError:
+            continue
+        ranges.append((media_type, params, min(max(q, 0.0), 1.0)))
+    return ranges
+
+
+def _range_specificity(media_range: str, params: Dict[str, str], media_type: str,
+                       type_params: Dict[str, str]) -> int:
+    """How specifically a media range matches a media type, or -1 if it does not."""
+    if any(type_params.get(key) != value for key, value in params.items()):
+        return -1
+    if media_range == media_type:
+        return 2 + len(params)
+    if media_range == media_type.split('/')[0] + '/*':
+        return 1
+    return 0 if media_range == '*/*' else -1
+
+
+def negotiate_raster_format(accept: Optional[str] = None, requested: Optional[str] = None,
+                            default: str = DEFAULT_RASTER_FORMAT) -> str:
+    """Pick a raster encoding from an explicit request or an Accept header.
+
+    An explicit ``requested`` format (e.g. a ``raster_format`` query parameter) wins.
+    Otherwise each supported media type takes the q-value of the most specific range
+    in ``accept`` that matches it; the highest q wins, ties going to the range listed
+    first and then to ``default``. Types with q=0 are never chosen, and ``default`` is
+    returned when nothing acceptable is supported.
+    """
+    if requested:
+        if requested not in RASTER_FORMATS:
+            raise ValueError(f"Unsupported raster format: {requested}")
+        return requested
+
+    ranges = _parse_accept(accept)
+    best, best_rank = default, None
+    for media_type, raster_format in MEDIA_TYPE_FORMATS.items():
+        media_type, type_params = _parse_media_type(media_type)
+        matches = [
+            (_range_specificity(name, params, media_type, type_params), -position, q)
+            for position, (name, params, q) in enumerate(ranges)
+        ]
+        specificity, position, q = max(matches, default=(-1, 0, 0.0))
+        if specificity < 0 or q <= 0:
+            continue
+        rank = (q, position, raster_format == default)
+        if best_rank is None or rank > best_rank:
+            best, best_rank = raster_format, rank
+    return best
+
+
+def run_length_encode(array: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-major run-length encoding returning (values, counts)."""
+    flat = np.ascontiguousarray(array).ravel()
+    if flat.size == 0:
+        return flat[:0], np.zeros(0, dtype=np.int64)
+
+    # NaN never equals itself, so compare NaN-ness separately
+    changed = flat[1:] != flat[:-1]
+    if np.issubdtype(flat.dtype, np.floating):
+        nan = np.isnan(flat)
+        changed &= ~(nan[1:] & nan[:-1])
+    starts = np.concatenate(([0], np.flatnonzero(changed) + 1))
+    counts = np.diff(np.append(starts, flat.size))
+    return flat[starts], counts
+
+
+def run_length_decode(values: np.ndarray, counts: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+    return np.repeat(values, counts).reshape(shape)
+
+
+def quantize_uint8(array: np.ndarray, value_range: Tuple[float, float]) -> np.ndarray:
+    """Scale values in value_range to 1..255; 0 marks nodata (NaN or out-of-range fill)."""
+    low, high = value_range
+    scaled = np.full(array.shape, 0, dtype=np.uint8)
+    finite = np.isfinite(array)
+    scaled[finite] = np.rint((np.clip(array[finite], low, high) - low) / (high - low) * 254).astype(np.uint8) + 1
+    return scaled
+
+
+def _png_bytes(array: np.ndarray) -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.fromarray(array, mode='L').save(buffer, format='PNG', optimize=False)
+    return buffer.getvalue()
+
+
+def _npy_bytes(array: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def write_cog(path: str, array: np.ndarray, meta: Dict[str, Any], nodata: Optional[float] = None,
+              tags: Optional[Dict[str, Any]] = None, band_names: Optional[Sequence[str]] = None) -> str:
+    """Write a tiled, compressed GeoTIFF with internal overviews.
+
+    ``array`` is a single band (rows, cols) or a band stack (bands, rows, cols);
+    ``band_names`` become the band descriptions.
+    """
+    import rasterio
+    from rasterio.enums import Resampling
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    stack = array[np.newaxis] if array.ndim == 2 else array
+    count, height, width = stack.shape
+    profile = {
+        'driver': 'GTiff',
+        'height': height,
+        'width': width,
+        'count': count,
+        'dtype': array.dtype.name,
+        'crs': meta.get('crs'),
+        'transform': meta.get('transform'),
+        'nodata': nodata,
+        'tiled': True,
+        'blockxsize': 256,
+        'blockysize': 256,
+        'compress': 'deflate',
+        'predictor': 3 if np.issubdtype(array.dtype, np.floating) else 2,
+        'interleave': 'band',
+        'BIGTIFF': 'IF_SAFER',
+    }
+    with rasterio.open(path, 'w', **profile) as dst:
+        dst.write(stack)
+        for band, name in enumerate(band_names or [], start=1):
+            dst.set_band_description(band, name)
+        if tags:
+            dst.update_tags(**{key: str(value) for key, value in tags.items()})
+        factors = [factor for factor in (2, 4, 8, 16) if min(height, width) // factor >= 64]
+        if factors:
+            dst.build_overviews(factors, Resampling.nearest if array.dtype.kind in 'iu' else Resampling.average)
+    return path
+
+
+def encode_raster(array: np.ndarray, fmt: str = DEFAULT_RASTER_FORMAT, nodata: Optional[float] = None,
+                  value_range: Optional[Tuple[float, float]] = None, meta: Optional[Dict[str, Any]] = None,
+                  cog_path: Optional[str] = None) -> Any:
+    """Encode a 2-D raster for an API response.
+
+    Args:
+        array: Raster to encode (zone labels or index values).
+        fmt: One of RASTER_FORMATS.
+        nodata: Fill value marking pixels without data (e.g. -1 in zone maps).
+        value_range: (low, high) used to quantise float rasters for 'png'; integer rasters
+            are offset so ``nodata`` maps to 0.
+        meta: Raster metadata with 'crs' and 'transform', required for 'cog'.
+        cog_path: Destination file for 'cog'; the response carries a reference to it.
+    """
+    if fmt not in RASTER_FORMATS:
+        raise ValueError(f"Unsupported raster format: {fmt}")
+
+    if fmt == 'list':
+        return array.tolist()
+
+    encoded: Dict[str, Any] = {
+        'format': fmt,
+        'shape': list(array.shape),
+        'dtype': array.dtype.name,
+        'nodata': nodata,
+    }
+
+    if fmt == 'rle':
+        values, counts = run_length_encode(array)
+        encoded.update({'values': values.tolist(), 'counts': counts.tolist()})
+
+    elif fmt == 'npy':
+        if array.dtype.kind in 'iu' and array.size and array.min() >= -128 and array.max() <= 127:
+            array = array.astype(np.int8)
+            encoded['dtype'] = 'int8'
+        encoded['data'] = base64.b64encode(_npy_bytes(array)).decode('ascii')
+
+    elif fmt == 'png':
+        if array.dtype.kind in 'iu':
+            # Shift labels so nodata lands on 0 (or the smallest label on 1)
+            offset = -int(nodata) if nodata is not None else 1 - int(array.min())
+            quantized = np.clip(array.astype(np.int64) + offset, 0, 255).astype(np.uint8)
+            encoded.update({'offset': int(offset), 'scale': 1})
+        else:
+            low, high = value_range if value_range else (-1.0, 1.0)
+            quantized = quantize_uint8(array, (low, high))
+            encoded.update({'offset': low, 'scale': (high - low) / 254, 'value_origin': 1})
+        encoded['dtype'] = 'uint8'
+        encoded['data'] = base64.b64encode(_png_bytes(quantized)).decode('ascii')
+
+    elif fmt == 'cog':
+        if meta is None or cog_path is None:
+            raise ValueError("COG encoding needs raster metadata and a destination path")
+        encoded['uri'] = write_cog(cog_path, array, meta, nodata=nodata)
+
+    return encoded
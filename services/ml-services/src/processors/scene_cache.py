@@ -0,0 +1,146 @@
+"""
+Scene Cache
+Content-addressed, memory-bounded LRU cache for clipped scenes and vegetation indices
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _nbytes(value: Any) -> int:
+    """Approximate memory footprint of a cached value (arrays dominate)."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(item) for item in value)
+    return 0
+
+
+def _freeze(value: Any) -> Any:
+    """Mark cached arrays read-only so shared entries cannot be mutated by callers."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        for item in value.values():
+            _freeze(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _freeze(item)
+    return value
+
+
+class SceneCache:
+    """LRU cache keyed by scene identity, boundary geometry and index set, bounded by array bytes."""
+
+    def __init__(self, max_bytes: int = 512 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, int]]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._pending: Dict[Hashable, 'asyncio.Future'] = {}
+
+    @staticmethod
+    def scene_key(image_path: str, boundary_geom, version: Optional[str] = None) -> Tuple:
+        """Key identifying a scene file version clipped to a boundary.
+
+        Local files are versioned by modification time and size. Remote objects have no
+        stat and are versioned by ``version`` (their ETag, see ``RemoteSceneReader.version``).
+        """
+        if version is not None:
+            version = (version, None)
+        else:
+            try:
+                stat = os.stat(image_path)
+                version = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                # Unversioned remote or virtual paths are keyed by path alone
+                version = (None, None)
+        geometry_hash = hashlib.sha1(boundary_geom.wkb).hexdigest()
+        return (os.path.abspath(image_path) if '://' not in image_path else image_path,) + version + (geometry_hash,)
+
+    @staticmethod
+    def index_key(scene_key: Tuple, index_names: Sequence[str]) -> Tuple:
+        """Key identifying a set of indices computed from a clipped scene."""
+        return scene_key + (tuple(sorted(index_names)),)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        size = _nbytes(value)
+        _freeze(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                # Larger than the whole budget: hand back without caching
+                logger.debug(f"Scene cache entry of {size} bytes exceeds budget, not cached")
+                return value
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            self._evict()
+        return value
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and caching it on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, compute())
+        return value
+
+    async def get_or_compute_async(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant that also deduplicates concurrent computations of the same key."""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        pending = self._pending.get(key)
+        if pending is None:
+            async def compute_and_put() -> Any:
+                try:
+                    return self.put(key, await compute())
+                finally:
+                    self._pending.pop(key, None)
+
+            pending = self._pending[key] = asyncio.ensure_future(compute_and_put())
+        return await pending
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -0,0 +1,387 @@
+"""
+Scene Catalogue
+On-disk spatio-temporal index of satellite scenes backed by SQLite and its R-tree module
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import rasterio
+from rasterio.warp import transform_bounds, transform_geom
+from shapely import wkb
+from shapely.geometry import box, mapping, shape
+
+from src.processors.remote_scenes import is_remote, vsi_path
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CRS = 'EPSG:4326'
+
+SCENE_EXTENSIONS = ('.tif', '.tiff', '.jp2', '.vrt')
+
+# Metadata tags checked (in order) for acquisition time, sensor and cloud cover
+ACQUISITION_TAGS = ('ACQUISITION_DATE', 'DATE_ACQUIRED', 'SENSING_TIME', 'PRODUCT_START_TIME', 'TIFFTAG_DATETIME')
+SENSOR_TAGS = ('SPACECRAFT_ID', 'SPACECRAFT_NAME', 'PLATFORM', 'SENSOR')
+CLOUD_TAGS = ('CLOUD_FRACTION', 'CLOUD_COVER', 'CLOUDY_PIXEL_PERCENTAGE', 'CLOUD_COVERAGE_ASSESSMENT')
+
+# Filename fallbacks, e.g. S2A_MSIL2A_20240315T052651_... or LC09_L2SP_146040_20240302_...
+FILENAME_DATE = re.compile(r'(?<!\d)(\d{4})-?(\d{2})-?(\d{2})(?:T(\d{2})(\d{2})(\d{2}))?(?!\d)')
+FILENAME_SENSORS = (
+    (re.compile(r'^S2[AB]?_', re.IGNORECASE), 'sentinel-2'),
+    (re.compile(r'^S1[AB]?_', re.IGNORECASE), 'sentinel-1'),
+    (re.compile(r'^L[COT]0?9', re.IGNORECASE), 'landsat-9'),
+    (re.compile(r'^L[COT]0?8', re.IGNORECASE), 'landsat-8'),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenes (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    acquired_at TEXT NOT NULL,
+    sensor TEXT,
+    cloud_fraction REAL,
+    crs TEXT,
+    footprint BLOB NOT NULL,
+    version TEXT,
+    indexed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scenes_acquired_at ON scenes (acquired_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS scene_extents USING rtree (
+    id, min_x, max_x, min_y, max_y, min_t, max_t
+);
+"""
+
+
+def _parse_datetime(value: str) -> Optional[datetime]:
+    """Parse the timestamp formats found in GDAL metadata and scene filenames."""
+    value = value.strip().rstrip('Z')
+    for fmt in ('%Y:%m:%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value[:26], fmt)
+        except ValueError:
+            continue
+    match = FILENAME_DATE.search(value)
+    if match:
+        year, month, day, hour, minute, second = match.groups()
+        try:
+            return datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0))
+        except ValueError:
+            return None
+    return None
+
+
+def _epoch_days(timestamp: datetime) -> float:
+    return timestamp.replace(tzinfo=timezone.utc).timestamp() / 86400.0
+
+
+def _isoformat(timestamp: datetime) -> str:
+    # Fixed-width strings so that SQL ordering matches chronological ordering
+    return timestamp.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def read_scene_metadata(path: str, version: Optional[str] = None) -> Dict[str, Any]:
+    """Footprint (in EPSG:4326), acquisition time, sensor and cloud fraction of a scene file."""
+    with rasterio.open(vsi_path(path) if is_remote(path) else path) as src:
+        tags = {key.upper(): value for key, value in src.tags().items()}
+        footprint = box(*transform_bounds(src.crs, CATALOG_CRS, *src.bounds, densify_pts=21))
+        crs = src.crs.to_string() if src.crs else None
+
+    name = Path(path).name
+    acquired_at = next(
+        (parsed for parsed in (_parse_datetime(tags[tag]) for tag in ACQUISITION_TAGS if tag in tags) if parsed),
+        None
+    ) or _parse_datetime(name)
+    if acquired_at is None:
+        # Last resort for files without dated metadata or names
+        acquired_at = datetime.utcfromtimestamp(os.stat(path).st_mtime) if os.path.exists(path) else datetime.utcnow()
+
+    sensor = next((tags[tag].lower() for tag in SENSOR_TAGS if tags.get(tag)), None)
+    if sensor is None:
+        sensor = next((label for pattern, label in FILENAME_SENSORS if pattern.search(name)), None)
+
+    cloud_fraction = None
+    for tag in CLOUD_TAGS:
+        try:
+            cloud_fraction = float(tags[tag])
+        except (KeyError, ValueError):
+            continue
+        # Percentages (e.g. CLOUDY_PIXEL_PERCENTAGE) are stored as fractions
+        if tag != 'CLOUD_FRACTION' and cloud_fraction > 1:
+            cloud_fraction /= 100.0
+        break
+
+    return {
+        'path': path,
+        'acquired_at': acquired_at,
+        'sensor': sensor,
+        'cloud_fraction': cloud_fraction,
+        'crs': crs,
+        'footprint': footprint,
+        'version': version,
+    }
+
+
+class SceneCatalog:
+    """SQLite catalogue of scene footprints and acquisition times with an R-tree index.
+
+    Every scene is stored once in ``scenes`` and as a 3-D box (lon, lat, days since
+    epoch) in the ``scene_extents`` R-tree, so "latest N scenes overlapping this field
+    before date D" is answered from the index instead of by scanning storage. The
+    R-tree stores 32-bit bounds, so candidates are re-checked against the exact
+    footprint and timestamp.
+    """
+
+    def __init__(self, db_path: str = 'data/scene_catalog.sqlite'):
+        self.db_path = db_path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'SceneCatalog':
+        """Build a catalogue from the ``catalog`` section of the processor config."""
+        return cls(db_path=config.get('path', 'data/scene_catalog.sqlite'))
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._connection is None:
+                if self.db_path != ':memory:':
+                    Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+                self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._connection.row_factory = sqlite3.Row
+                self._connection.execute('PRAGMA journal_mode=WAL')
+                self._connection.executescript(SCHEMA)
+            return self._connection
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Connections and locks stay with the owning process
+        return {'db_path': self.db_path}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__(state['db_path'])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection.execute('SELECT COUNT(*) FROM scenes').fetchone()[0]
+
+    def upsert(self, scene: Dict[str, Any]):
+        """Insert or replace a scene record as returned by ``read_scene_metadata``."""
+        footprint = scene['footprint']
+        min_x, min_y, max_x, max_y = footprint.bounds
+        days = _epoch_days(scene['acquired_at'])
+        with self._lock:
+            connection = self.connection
+            with connection:
+                row = connection.execute('SELECT id FROM scenes WHERE path = ?', (scene['path'],)).fetchone()
+                values = (
+                    _isoformat(scene['acquired_at']), scene.get('sensor'), scene.get('cloud_fraction'),
+                    scene.get('crs'), wkb.dumps(footprint), scene.get('version'), _isoformat(datetime.utcnow())
+                )
+                if row is None:
+                    scene_id = connection.execute(
+                        'INSERT INTO scenes (acquired_at, sensor, cloud_fraction, crs, footprint, version, indexed_at, path) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', values + (scene['path'],)
+                    ).lastrowid
+                else:
+                    scene_id = row['id']
+                    connection.execute(
+                        'UPDATE scenes SET acquired_at = ?, sensor = ?, cloud_fraction = ?, crs = ?, footprint = ?, '
+                        'version = ?, indexed_at = ? WHERE id = ?', values + (scene_id,)
+                    )
+                connection.execute(
+                    'INSERT OR REPLACE INTO scene_extents VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (scene_id, min_x, max_x, min_y, max_y, days, days)
+                )
+
+    def remove(self, paths: Iterable[str]) -> int:
+        """Drop scenes by path; returns the number removed."""
+        removed = 0
+        with self._lock:
+            connection = self.connection
+            with connection:
+                for path in paths:
+                    row = connection.execute('SELECT id FROM scenes WHERE path = ?', (path,)).fetchone()
+                    if row is not None:
+                        connection.execute('DELETE FROM scene_extents WHERE id = ?', (row['id'],))
+                        connection.execute('DELETE FROM scenes WHERE id = ?', (row['id'],))
+                        removed += 1
+        return removed
+
+    def versions(self, prefix: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """Stored version tokens by path, optionally limited to paths under a prefix."""
+        query, params = 'SELECT path, version FROM scenes', ()
+        if prefix:
+            query, params = query + ' WHERE substr(path, 1, ?) = ?', (len(prefix), prefix)
+        with self._lock:
+            return {row['path']: row['version'] for row in self.connection.execute(query, params)}
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.connection.execute('SELECT * FROM scenes WHERE path = ?', (path,)).fetchone()
+        return self._record(row) if row is not None else None
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record['footprint'] = wkb.loads(record['footprint'])
+        return record
+
+    def find_overlapping(self, geometry, before: Optional[datetime] = None, after: Optional[datetime] = None,
+                         limit: Optional[int] = None, max_cloud_fraction: Optional[float] = None,
+                         sensor: Optional[str] = None, exclude: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """Scenes whose footprint intersects ``geometry`` (EPSG:4326), newest first.
+
+        ``before`` and ``after`` are exclusive bounds on acquisition time.
+        """
+        min_x, min_y, max_x, max_y = geometry.bounds
+        query = [
+            'SELECT s.* FROM scene_extents e JOIN scenes s ON s.id = e.id',
+            'WHERE e.max_x >= ? AND e.min_x <= ? AND e.max_y >= ? AND e.min_y <= ?',
+        ]
+        params: List[Any] = [min_x, max_x, min_y, max_y]
+        if before is not None:
+            query.append('AND e.min_t <= ? AND s.acquired_at < ?')
+            params += [_epoch_days(before), _isoformat(before)]
+        if after is not None:
+            query.append('AND e.max_t >= ? AND s.acquired_at > ?')
+            params += [_epoch_days(after), _isoformat(after)]
+        if max_cloud_fraction is not None:
+            query.append('AND (s.cloud_fraction IS NULL OR s.cloud_fraction <= ?)')
+            params.append(max_cloud_fraction)
+        if sensor is not None:
+            query.append('AND s.sensor = ?')
+            params.append(sensor)
+        query.append('ORDER BY s.acquired_at DESC')
+
+        excluded = set(exclude)
+        matches = []
+        with self._lock:
+            cursor = self.connection.execute(' '.join(query), params)
+            for row in cursor:
+                if row['path'] in excluded:
+                    continue
+                record = self._record(row)
+                # The R-tree only filters on bounding boxes
+                if not record['footprint'].intersects(geometry):
+                    continue
+                matches.append(record)
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+
+class SceneIndexer:
+    """Incrementally synchronises a SceneCatalog with directories or object-store listings.
+
+    Each scene carries a version token (mtime and size for local files, ETag or
+    modification time for objects); unchanged scenes are skipped without opening them
+    and scenes that disappeared from a listing are removed. Objects are catalogued as
+    s3:// URIs and opened inside ``env`` (e.g. ``RemoteSceneReader.env``), so custom
+    endpoints and credentials apply.
+    """
+
+    def __init__(self, catalog: SceneCatalog, extensions: Tuple[str, ...] = SCENE_EXTENSIONS,
+                 env: Optional[Callable[[], Any]] = None):
+        self.catalog = catalog
+        self.extensions = tuple(extension.lower() for extension in extensions)
+        self.env = env
+
+    @staticmethod
+    def file_version(path: str) -> Optional[str]:
+        """Version token of a local file, or None if it cannot be stat'ed."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return f'{stat.st_mtime_ns}:{stat.st_size}'
+
+    def index_file(self, path: str, version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Read and store one scene; returns its metadata or None if it cannot be read."""
+        remote = is_remote(path)
+        if version is None and not remote:
+            version = self.file_version(path)
+        try:
+            with (self.env() if remote and self.env is not None else nullcontext()):
+                scene = read_scene_metadata(path, version)
+        except Exception as e:
+            logger.warning(f"Skipping unreadable scene {path}: {e}")
+            return None
+        self.catalog.upsert(scene)
+        return scene
+
+    def index_entries(self, entries: Iterable[Tuple[str, str]], prefix: Optional[str] = None,
+                      prune: bool = True) -> Dict[str, int]:
+        """Sync the catalogue with (path, version) pairs listed under ``prefix``."""
+        known = self.catalog.versions(prefix)
+        counts = {'added': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'removed': 0}
+        seen = set()
+
+        for path, version in entries:
+            if not path.lower().endswith(self.extensions):
+                continue
+            seen.add(path)
+            if path in known and known[path] == version:
+                counts['unchanged'] += 1
+                continue
+            if self.index_file(path, version) is None:
+                counts['failed'] += 1
+            else:
+                counts['updated' if path in known else 'added'] += 1
+
+        if prune:
+            counts['removed'] = self.catalog.remove(path for path in known if path not in seen)
+
+        logger.info(f"Scene catalogue sync for {prefix or 'all scenes'}: {counts}")
+        return counts
+
+    def index_directory(self, root: str, recursive: bool = True, prune: bool = True) -> Dict[str, int]:
+        """Sync all scene files below a local directory."""
+        root = os.path.abspath(root)
+
+        def entries():
+            walker = os.walk(root) if recursive else [(root, [], os.listdir(root))]
+            for directory, _, filenames in walker:
+                for filename in filenames:
+                    path = os.path.join(directory, filename)
+                    version = self.file_version(path)
+                    if version is not None:
+                        yield path, version
+
+        return self.index_entries(entries(), prefix=root + os.sep, prune=prune)
+
+    def index_s3_prefix(self, client, bucket: str, prefix: str = '', prune: bool = True) -> Dict[str, int]:
+        """Sync scenes listed under an S3 prefix, catalogued as ``s3://bucket/key`` URIs.
+
+        The version token is the object ETag, as returned by ``RemoteSceneReader.version``.
+        """
+        def entries():
+            paginator = client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+                for item in page.get('Contents', []):
+                    yield f"s3://{bucket}/{item['Key']}", item.get('ETag', '').strip('"') or str(item['LastModified'])
+
+        counts = self.index_entries(entries(), prefix=f's3://{bucket}/{prefix}', prune=prune)
+        if prune:
+            # Rows catalogued under GDAL's /vsis3/ paths by earlier versions are superseded
+            counts['removed'] += self.catalog.remove(self.catalog.versions(f'/vsis3/{bucket}/{prefix}'))
+        return counts
+
+
+def geometry_to_catalog_crs(geometry, crs) -> Any:
+    """Reproject a shapely geometry into the catalogue CRS."""
+    if crs is None or str(crs) == CATALOG_CRS:
+        return geometry
+    return shape(transform_geom(crs, CATALOG_CRS, mapping(geometry)))
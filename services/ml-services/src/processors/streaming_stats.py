@@ -0,0 +1,122 @@
+"""
+Streaming Statistics Reducers
+Mergeable accumulators for computing raster statistics window by window
+"""
+
+import numpy as np
+from typing import Dict, Any
+
+
+class RunningStatistics:
+    """Mergeable count/mean/variance/min/max accumulator (Chan et al. parallel update)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray):
+        """Fold a chunk of values into the running statistics."""
+        values = np.asarray(values).ravel()
+        if values.size == 0:
+            return
+
+        chunk = RunningStatistics()
+        chunk.count = int(values.size)
+        chunk.mean = float(np.mean(values, dtype=np.float64))
+        chunk.m2 = float(np.sum(np.square(values - chunk.mean, dtype=np.float64)))
+        chunk.min = float(np.min(values))
+        chunk.max = float(np.max(values))
+        self.merge(chunk)
+
+    def merge(self, other: 'RunningStatistics'):
+        """Merge another accumulator into this one."""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """Population variance (matches np.var / np.std defaults)."""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary in the same shape as the per-zone characteristics."""
+        return {
+            'mean': float(self.mean),
+            'std': self.std,
+            'min': float(self.min),
+            'max': float(self.max)
+        }
+
+
+class GroupedStatistics:
+    """Per-group count/mean/variance/min/max accumulated with bincount-style reductions."""
+
+    def __init__(self, n_groups: int):
+        self.n_groups = n_groups
+        self.count = np.zeros(n_groups, dtype=np.int64)
+        self.total = np.zeros(n_groups, dtype=np.float64)
+        self.total_sq = np.zeros(n_groups, dtype=np.float64)
+        self.min = np.full(n_groups, np.inf)
+        self.max = np.full(n_groups, -np.inf)
+
+    def update(self, groups: np.ndarray, values: np.ndarray):
+        """Fold values labelled with integer group ids in [0, n_groups) into the totals."""
+        groups = np.asarray(groups).ravel()
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if groups.size == 0:
+            return
+
+        self.count += np.bincount(groups, minlength=self.n_groups)
+        self.total += np.bincount(groups, weights=values, minlength=self.n_groups)
+        self.total_sq += np.bincount(groups, weights=values * values, minlength=self.n_groups)
+        np.minimum.at(self.min, groups, values)
+        np.maximum.at(self.max, groups, values)
+
+    def merge(self, other: 'GroupedStatistics'):
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        np.minimum(self.min, other.min, out=self.min)
+        np.maximum(self.max, other.max, out=self.max)
+
+    @property
+    def mean(self) -> np.ndarray:
+        return np.divide(self.total, self.count, out=np.zeros(self.n_groups), where=self.count > 0)
+
+    @property
+    def variance(self) -> np.ndarray:
+        mean_sq = np.divide(self.total_sq, self.count, out=np.zeros(self.n_groups), where=self.count > 0)
+        return np.maximum(mean_sq - self.mean ** 2, 0)
+
+    def to_running(self, group: int) -> RunningStatistics:
+        """Running statistics view of one group, e.g. for reports shared with the tiled path."""
+        stats = RunningStatistics()
+        stats.count = int(self.count[group])
+        if stats.count:
+            stats.mean = float(self.mean[group])
+            stats.m2 = float(self.variance[group] * stats.count)
+            stats.min = float(self.min[group])
+            stats.max = float(self.max[group])
+        return stats
+
+    def to_dict(self, group: int) -> Dict[str, Any]:
+        return self.to_running(group).to_dict()
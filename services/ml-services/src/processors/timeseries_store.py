@@ -0,0 +1,279 @@
+"""
+Vegetation Time-Series Store
+Append-only, memory-mapped per-farm cubes of date x index x summary statistic
+"""
+
+import fcntl
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.processors.vegetation_indices import VEGETATION_INDICES
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_STATISTICS = ['mean', 'std', 'min', 'max', 'pixel_count']
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def _to_day(date) -> int:
+    """Days since the Unix epoch for a datetime, date or ISO string."""
+    if isinstance(date, str):
+        date = datetime.fromisoformat(date.rstrip('Z'))
+    return int((np.datetime64(date, 'D') - EPOCH).astype(np.int64))
+
+
+class FarmTimeSeries:
+    """One farm's cube, stored as ``dates.i4`` and ``cube.f4`` memmaps plus ``meta.json``.
+
+    Rows are appended in arrival order and the committed length lives in the metadata,
+    which is rewritten atomically after the data is flushed; a crash mid-append leaves
+    the previous length in place. An observation for a date already present replaces
+    that row. Capacity doubles when full, so appends stay amortised O(1).
+
+    Appends and resizes hold an exclusive ``flock`` on the directory's ``lock`` file
+    and reads a shared one, so several worker processes may write the same farm.
+    """
+
+    def __init__(self, directory: Path, indices: Sequence[str], statistics: Sequence[str],
+                 initial_capacity: int = 64):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._dates: Optional[np.memmap] = None
+        self._cube: Optional[np.memmap] = None
+
+        with self._locked():
+            meta_path = self.directory / 'meta.json'
+            if meta_path.exists():
+                meta = json.loads(meta_path.read_text())
+            else:
+                meta = {'indices': list(indices), 'statistics': list(statistics), 'length': 0, 'capacity': 0}
+
+            self.indices: List[str] = meta['indices']
+            self.statistics: List[str] = meta['statistics']
+            self.length: int = meta['length']
+            self.capacity: int = meta['capacity']
+            if self.capacity:
+                self._map()
+            else:
+                self._grow(initial_capacity)
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return (self.length, len(self.indices), len(self.statistics))
+
+    @contextmanager
+    def _locked(self, shared: bool = False):
+        """Serialise access across threads and, via ``flock`` on a lock file, across processes."""
+        with self._lock, open(self.directory / 'lock', 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Pick up rows and growth committed by other processes since the last access."""
+        meta = json.loads((self.directory / 'meta.json').read_text())
+        self.length = meta['length']
+        if meta['capacity'] != self.capacity:
+            self.capacity = meta['capacity']
+            self._map()
+
+    def _map(self):
+        self._dates = np.memmap(self.directory / 'dates.i4', dtype=np.int32, mode='r+', shape=(self.capacity,))
+        self._cube = np.memmap(self.directory / 'cube.f4', dtype=np.float32, mode='r+',
+                               shape=(self.capacity, len(self.indices), len(self.statistics)))
+
+    def _grow(self, capacity: int):
+        row_bytes = len(self.indices) * len(self.statistics) * 4
+        for name, size in (('dates.i4', capacity * 4), ('cube.f4', capacity * row_bytes)):
+            with open(self.directory / name, 'ab') as handle:
+                handle.truncate(size)
+        self.capacity = capacity
+        self._map()
+        self._write_meta()
+
+    def _write_meta(self):
+        meta = {'indices': self.indices, 'statistics': self.statistics,
+                'length': self.length, 'capacity': self.capacity}
+        temporary = self.directory / 'meta.json.tmp'
+        temporary.write_text(json.dumps(meta))
+        os.replace(temporary, self.directory / 'meta.json')
+
+    def append(self, date, summaries: Dict[str, Dict[str, float]]):
+        """Store per-index summaries (e.g. ``{'ndvi': {'mean': ..., 'std': ...}}``) for a date."""
+        day = _to_day(date)
+        row = np.full((len(self.indices), len(self.statistics)), np.nan, dtype=np.float32)
+        for i, index in enumerate(self.indices):
+            values = summaries.get(index)
+            if values:
+                row[i] = [values.get(statistic, np.nan) for statistic in self.statistics]
+
+        with self._locked():
+            self._refresh()
+            existing = np.flatnonzero(self._dates[:self.length] == day)
+            if existing.size:
+                position = int(existing[0])
+            else:
+                if self.length == self.capacity:
+                    self._grow(self.capacity * 2)
+                position = self.length
+            self._dates[position] = day
+            self._cube[position] = row
+            self._dates.flush()
+            self._cube.flush()
+            if position == self.length:
+                self.length += 1
+                self._write_meta()
+
+    def read(self, indices: Optional[Sequence[str]] = None, statistics: Optional[Sequence[str]] = None,
+             start=None, end=None) -> Tuple[np.ndarray, np.ndarray]:
+        """Chronologically sorted (dates as datetime64[D], cube[date, index, statistic])."""
+        with self._locked(shared=True):
+            self._refresh()
+            days = np.array(self._dates[:self.length])
+            cube = np.array(self._cube[:self.length])
+
+        keep = np.ones(days.shape, dtype=bool)
+        if start is not None:
+            keep &= days >= _to_day(start)
+        if end is not None:
+            keep &= days <= _to_day(end)
+        order = np.flatnonzero(keep)[np.argsort(days[keep], kind='stable')]
+
+        index_positions = [self.indices.index(name) for name in indices] if indices else slice(None)
+        stat_positions = [self.statistics.index(name) for name in statistics] if statistics else slice(None)
+        values = np.asarray(cube[order])[:, index_positions][:, :, stat_positions]
+        return EPOCH + days[order].astype('timedelta64[D]'), values
+
+
+class TimeSeriesStore:
+    """Directory of per-farm time-series cubes with vectorised trend, seasonality and anomaly reads."""
+
+    def __init__(self, root: str = 'data/timeseries', indices: Optional[Sequence[str]] = None,
+                 statistics: Optional[Sequence[str]] = None):
+        self.root = Path(root)
+        self.indices = list(indices) if indices else list(VEGETATION_INDICES)
+        self.statistics = list(statistics) if statistics else list(SUMMARY_STATISTICS)
+        self._series: Dict[str, FarmTimeSeries] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'TimeSeriesStore':
+        """Build a store from the ``timeseries`` section of the processor config."""
+        return cls(root=config.get('root', 'data/timeseries'))
+
+    @staticmethod
+    def _directory_name(farm_id: Any) -> str:
+        return re.sub(r'[^A-Za-z0-9_.-]', '_', str(farm_id))
+
+    def series(self, farm_id: Any) -> FarmTimeSeries:
+        """Open (or create) a farm's cube; handles are shared per store."""
+        key = self._directory_name(farm_id)
+        with self._lock:
+            if key not in self._series:
+                self._series[key] = FarmTimeSeries(self.root / key, self.indices, self.statistics)
+            return self._series[key]
+
+    def append(self, farm_id: Any, date, summaries: Dict[str, Dict[str, float]]):
+        self.series(farm_id).append(date, summaries)
+
+    def analyze(self, farm_id: Any, index: str = 'ndvi', statistic: str = 'mean',
+                trend_threshold: float = 0.05, anomaly_z: float = 2.0) -> Dict[str, Any]:
+        """Trend, monthly seasonality and anomalies for one index statistic of a farm."""
+        dates, values = self.series(farm_id).read([index], [statistic])
+        series = values[:, 0, 0].astype(np.float64)
+        valid = np.isfinite(series)
+        dates, series = dates[valid], series[valid]
+        if series.size < 2:
+            return {'status': 'insufficient_data', 'observations': int(series.size)}
+
+        return {
+            'observations': int(series.size),
+            'first_date': str(dates[0]),
+            'last_date': str(dates[-1]),
+            'trend': trend(dates, series, trend_threshold),
+            'seasonality': seasonality(dates, series),
+            'anomalies': anomalies(dates, series, anomaly_z),
+            'status': 'completed'
+        }
+
+
+def trend(dates: np.ndarray, values: np.ndarray, threshold: float = 0.05) -> Dict[str, Any]:
+    """Least-squares slope per 30 days; direction uses ``threshold`` on that slope."""
+    months = (dates - dates[0]).astype(np.float64) / 30.0
+    centred = months - months.mean()
+    denominator = np.dot(centred, centred)
+    slope = float(np.dot(centred, values - values.mean()) / denominator) if denominator else 0.0
+
+    direction = 'stable'
+    if slope > threshold:
+        direction = 'improving'
+    elif slope < -threshold:
+        direction = 'declining'
+    return {
+        'trend_direction': direction,
+        'trend_slope': slope,
+        'average_value': float(values.mean()),
+        'variability': float(values.std())
+    }
+
+
+def _month_of(dates: np.ndarray) -> np.ndarray:
+    return dates.astype('datetime64[M]').astype(np.int64) % 12
+
+
+def seasonality(dates: np.ndarray, values: np.ndarray) -> Dict[str, Any]:
+    """Monthly climatology (mean, std, count) from bincount reductions."""
+    months = _month_of(dates)
+    counts = np.bincount(months, minlength=12)
+    totals = np.bincount(months, weights=values, minlength=12)
+    totals_sq = np.bincount(months, weights=values * values, minlength=12)
+    means = np.divide(totals, counts, out=np.full(12, np.nan), where=counts > 0)
+    stds = np.sqrt(np.maximum(np.divide(totals_sq, counts, out=np.full(12, np.nan), where=counts > 0) - means ** 2, 0))
+
+    observed = counts > 0
+    amplitude = float(np.nanmax(means) - np.nanmin(means)) if observed.any() else 0.0
+    return {
+        'monthly_mean': [None if np.isnan(value) else float(value) for value in means],
+        'monthly_std': [None if np.isnan(value) else float(value) for value in stds],
+        'monthly_count': counts.tolist(),
+        'peak_month': int(np.nanargmax(means)) + 1 if observed.any() else None,
+        'amplitude': amplitude
+    }
+
+
+def anomalies(dates: np.ndarray, values: np.ndarray, z_threshold: float = 2.0) -> List[Dict[str, Any]]:
+    """Observations deviating from their calendar month by more than ``z_threshold`` std.
+
+    Months with fewer than three observations fall back to the whole-series mean and std.
+    """
+    months = _month_of(dates)
+    counts = np.bincount(months, minlength=12)
+    totals = np.bincount(months, weights=values, minlength=12)
+    totals_sq = np.bincount(months, weights=values * values, minlength=12)
+
+    enough = counts >= 3
+    month_means = np.divide(totals, counts, out=np.zeros(12), where=enough)
+    month_stds = np.sqrt(np.maximum(np.divide(totals_sq, counts, out=np.zeros(12), where=enough) - month_means ** 2, 0))
+    expected = np.where(enough[months], month_means[months], values.mean())
+    spread = np.where(enough[months], month_stds[months], values.std())
+
+    z_scores = np.divide(values - expected, spread, out=np.zeros_like(values), where=spread > 0)
+    flagged = np.flatnonzero(np.abs(z_scores) > z_threshold)
+    return [
+        {'date': str(dates[i]), 'value': float(values[i]), 'expected': float(expected[i]),
+         'z_score': float(z_scores[i])}
+        for i in flagged
+    ]
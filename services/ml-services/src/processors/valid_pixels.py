@@ -0,0 +1,46 @@
+"""
+Valid Pixel Sets
+Compressed views of the pixels of a clipped raster that carry data
+"""
+
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+
+class ValidPixels(NamedTuple):
+    """Flat positions of the valid pixels of a 2-D raster grid.
+
+    A clip's valid pixels are those inside the boundary whose bands are not nodata.
+    ``compress`` gathers them into 1-D arrays (or a ``(bands, n)`` stack) so per-pixel
+    stages skip fill values entirely; ``scatter`` restores a full raster for output.
+    """
+
+    shape: Tuple[int, int]
+    index: np.ndarray
+
+    @classmethod
+    def from_mask(cls, valid: np.ndarray) -> 'ValidPixels':
+        return cls(tuple(valid.shape), np.flatnonzero(valid))
+
+    @property
+    def count(self) -> int:
+        return int(self.index.size)
+
+    @property
+    def mask(self) -> np.ndarray:
+        valid = np.zeros(self.shape[0] * self.shape[1], dtype=bool)
+        valid[self.index] = True
+        return valid.reshape(self.shape)
+
+    def compress(self, raster: np.ndarray) -> np.ndarray:
+        """Valid pixels of a (rows, cols) raster or (bands, rows, cols) stack."""
+        if tuple(raster.shape[-2:]) != self.shape:
+            raise ValueError(f"Raster has shape {raster.shape}, expected trailing {self.shape}")
+        return np.take(raster.reshape(raster.shape[:-2] + (-1,)), self.index, axis=-1)
+
+    def scatter(self, values: np.ndarray, fill: float = np.nan, dtype=None) -> np.ndarray:
+        """Full raster with ``values`` at the valid pixels and ``fill`` elsewhere."""
+        out = np.full(self.shape[0] * self.shape[1], fill, dtype=dtype or values.dtype)
+        out[self.index] = values
+        return out.reshape(self.shape)
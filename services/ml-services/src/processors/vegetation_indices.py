@@ -0,0 +1,325 @@
+"""
+Vegetation Index Engine
+Fused, buffer-reusing computation of spectral vegetation indices
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Index name -> minimum number of bands required, in output order.
+# Band order is assumed to be [B, G, R, NIR, SWIR1, SWIR2].
+VEGETATION_INDICES = {
+    'ndvi': 4,
+    'evi': 4,
+    'savi': 4,
+    'gndvi': 4,
+    'ndwi': 4,
+    'osavi': 4,
+    'mcari': 4,
+    'ndmi': 5,
+    'nbr': 5,
+    'swir_ratio': 6,
+}
+
+SAVI_L = 0.5  # Soil brightness correction factor
+OSAVI_L = 0.16
+
+# Bump whenever an index formula changes so persisted index rasters are recomputed
+INDEX_VERSION = '2'
+
+
+class VegetationIndexEngine:
+    """Vectorised index kernel that computes shared band terms once per call.
+
+    Every index is written into a float32 output buffer with a masked divide and an
+    in-place clip to [-1, 1]. Scratch arrays are cached per raster shape and reused
+    between calls, so an engine instance must not be shared between threads.
+    """
+
+    def __init__(self, indices: Optional[Sequence[str]] = None):
+        self.default_indices = list(indices) if indices else list(VEGETATION_INDICES)
+        self._validate(self.default_indices)
+        self._workspace_shape: Optional[Tuple[int, ...]] = None
+        self._workspace: Dict[str, np.ndarray] = {}
+        self._output_shape: Optional[Tuple[int, ...]] = None
+        self._outputs: Dict[str, np.ndarray] = {}
+
+    @staticmethod
+    def _validate(indices: Sequence[str]):
+        unknown = [name for name in indices if name not in VEGETATION_INDICES]
+        if unknown:
+            raise ValueError(f"Unknown vegetation indices: {unknown}")
+
+    def resolve(self, n_bands: int, indices: Optional[Sequence[str]] = None) -> List[str]:
+        """Return the requested indices computable from n_bands, in canonical order."""
+        requested = self.default_indices if indices is None else list(indices)
+        self._validate(requested)
+        return [name for name, min_bands in VEGETATION_INDICES.items()
+                if name in requested and n_bands >= min_bands]
+
+    def output_buffers(self, shape: Tuple[int, ...], indices: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Return reusable output buffers for a raster shape.
+
+        The buffers are overwritten by the next call with the same engine, so they
+        suit window-by-window processing where each result is reduced straight away.
+        """
+        shape = tuple(shape)
+        if shape != self._output_shape:
+            self._output_shape = shape
+            self._outputs = {}
+        for name in indices:
+            if name not in self._outputs:
+                self._outputs[name] = np.empty(shape, dtype=np.float32)
+        return {name: self._outputs[name] for name in indices}
+
+    def _scratch(self, name: str, shape: Tuple[int, ...], dtype=np.float32) -> np.ndarray:
+        if shape != self._workspace_shape:
+            self._workspace_shape = shape
+            self._workspace = {}
+        buffer = self._workspace.get(name)
+        if buffer is None:
+            buffer = self._workspace[name] = np.empty(shape, dtype=dtype)
+        return buffer
+
+    def _band(self, image: np.ndarray, band_index: int, name: str) -> np.ndarray:
+        band = image[band_index]
+        if band.dtype == np.float32:
+            return band
+        buffer = self._scratch(name, band.shape)
+        np.copyto(buffer, band, casting='unsafe')
+        return buffer
+
+    def _masked_divide(self, numerator: np.ndarray, denominator: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """out = numerator / denominator where denominator != 0, else 0."""
+        valid = self._scratch('valid', denominator.shape, dtype=bool)
+        np.not_equal(denominator, 0, out=valid)
+        out.fill(0)
+        np.divide(numerator, denominator, out=out, where=valid)
+        return out
+
+    def compute(self, image: np.ndarray, indices: Optional[Sequence[str]] = None,
+                out: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+        """Compute vegetation indices for a (bands, ...) array.
+
+        Args:
+            image: Band stack ordered [B, G, R, NIR, SWIR1, SWIR2]; trailing dimensions
+                may be a 2-D raster or a 1-D vector of pixels.
+            indices: Subset of indices to compute; defaults to the engine's configured set.
+                Indices needing missing SWIR bands are skipped.
+            out: Optional preallocated float32 buffers keyed by index name.
+        """
+        if image.shape[0] < 4:
+            raise ValueError("Image must have at least 4 bands (B, G, R, NIR)")
+
+        names = self.resolve(image.shape[0], indices)
+        wanted = set(names)
+        shape = tuple(image.shape[1:])
+        out = dict(out) if out else {}
+        for name in names:
+            if name not in out:
+                out[name] = np.empty(shape, dtype=np.float32)
+
+        green = self._band(image, 1, 'green')
+        red = self._band(image, 2, 'red')
+        nir = self._band(image, 3, 'nir')
+
+        tmp = self._scratch('tmp', shape)
+        tmp2 = self._scratch('tmp2', shape)
+
+        # Shared NIR/red terms
+        if wanted & {'ndvi', 'evi', 'savi', 'osavi'}:
+            nir_minus_red = np.subtract(nir, red, out=self._scratch('nir_minus_red', shape))
+            nir_plus_red = np.add(nir, red, out=self._scratch('nir_plus_red', shape))
+
+            if 'ndvi' in wanted:
+                self._masked_divide(nir_minus_red, nir_plus_red, out['ndvi'])
+
+            if 'evi' in wanted:
+                blue = self._band(image, 0, 'blue')
+                np.multiply(red, 6, out=tmp)
+                np.add(nir, tmp, out=tmp)
+                np.multiply(blue, 7.5, out=tmp2)
+                np.subtract(tmp, tmp2, out=tmp)
+                np.add(tmp, 1, out=tmp)
+                self._masked_divide(nir_minus_red, tmp, out['evi'])
+                np.multiply(out['evi'], 2.5, out=out['evi'])
+
+            if 'savi' in wanted:
+                np.add(nir_plus_red, SAVI_L, out=tmp)
+                self._masked_divide(nir_minus_red, tmp, out['savi'])
+                np.multiply(out['savi'], 1 + SAVI_L, out=out['savi'])
+
+            if 'osavi' in wanted:
+                np.add(nir_plus_red, OSAVI_L, out=tmp)
+                self._masked_divide(nir_minus_red, tmp, out['osavi'])
+
+        # GNDVI and NDWI share the NIR/green terms; NDWI is the negated GNDVI
+        if wanted & {'gndvi', 'ndwi'}:
+            np.subtract(nir, green, out=tmp)
+            np.add(nir, green, out=tmp2)
+            gndvi = out['gndvi'] if 'gndvi' in wanted else out['ndwi']
+            self._masked_divide(tmp, tmp2, gndvi)
+            if 'ndwi' in wanted:
+                np.negative(gndvi, out=out['ndwi'])
+
+        if 'mcari' in wanted:
+            # ((R - G) - 0.2 (R - G)) * (R / G), zero where red is zero; a zero green band
+            # with non-zero red saturates to the clip bound below
+            np.subtract(red, green, out=tmp)
+            np.multiply(tmp, 0.8, out=tmp)
+            valid = np.not_equal(red, 0, out=self._scratch('valid', shape, dtype=bool))
+            out['mcari'].fill(0)
+            with np.errstate(divide='ignore'):
+                np.divide(red, green, out=out['mcari'], where=valid)
+            np.multiply(out['mcari'], tmp, out=out['mcari'])
+
+        if wanted & {'ndmi', 'nbr'}:
+            swir1 = self._band(image, 4, 'swir1')
+            np.subtract(nir, swir1, out=tmp)
+            np.add(nir, swir1, out=tmp2)
+            ndmi = out['ndmi'] if 'ndmi' in wanted else out['nbr']
+            self._masked_divide(tmp, tmp2, ndmi)
+            # NBR uses the same NIR/SWIR1 formulation
+            if 'ndmi' in wanted and 'nbr' in wanted:
+                np.copyto(out['nbr'], ndmi)
+
+        if 'swir_ratio' in wanted:
+            swir1 = self._band(image, 4, 'swir1')
+            swir2 = self._band(image, 5, 'swir2')
+            self._masked_divide(swir1, swir2, out['swir_ratio'])
+
+        # Clip values to reasonable ranges (in place; NDWI inherits GNDVI's clip)
+        for name in names:
+            np.clip(out[name], -1, 1, out=out[name])
+
+        return {name: out[name] for name in names}
+
+
+class ParallelIndexEngine:
+    """Computes indices over row stripes of a band stack in a thread pool.
+
+    Each stripe is a view of the input and writes straight into a view of the shared
+    float32 outputs, so nothing is copied or concatenated. NumPy's ufuncs release the
+    GIL, so threads scale across cores. Every worker thread has its own
+    ``VegetationIndexEngine`` for scratch buffers. Inputs smaller than ``min_pixels``
+    are computed serially on the calling thread.
+    """
+
+    def __init__(self, indices: Optional[Sequence[str]] = None, workers: Optional[int] = None,
+                 chunk_pixels: int = 512 * 1024, min_pixels: int = 1024 * 1024):
+        self.default_indices = list(indices) if indices else list(VEGETATION_INDICES)
+        VegetationIndexEngine._validate(self.default_indices)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_pixels = chunk_pixels
+        self.min_pixels = min_pixels
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], indices: Optional[Sequence[str]] = None) -> 'ParallelIndexEngine':
+        """Build an engine from the ``processing`` section of the processor config."""
+        return cls(
+            indices=indices,
+            workers=config.get('index_workers'),
+            chunk_pixels=config.get('index_chunk_pixels', 512 * 1024),
+            min_pixels=config.get('index_parallel_min_pixels', 1024 * 1024)
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Pools and thread-local engines are rebuilt on first use in the receiving process
+        state = self.__dict__.copy()
+        state.update({'_pool': None, '_pool_lock': None, '_local': None})
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._pool_lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='vegetation-index')
+        return self._pool
+
+    def _engine(self) -> VegetationIndexEngine:
+        engine = getattr(self._local, 'engine', None)
+        if engine is None:
+            engine = self._local.engine = VegetationIndexEngine(self.default_indices)
+        return engine
+
+    def resolve(self, n_bands: int, indices: Optional[Sequence[str]] = None) -> List[str]:
+        return self._engine().resolve(n_bands, indices)
+
+    def stripes(self, shape: Tuple[int, ...]) -> List[Tuple[int, int]]:
+        """Row ranges of about ``chunk_pixels`` pixels each, at least one per worker."""
+        n_rows = shape[0]
+        row_pixels = int(np.prod(shape[1:], dtype=np.int64)) or 1
+        rows = max(1, min(self.chunk_pixels // row_pixels, -(-n_rows // self.workers)))
+        return [(start, min(start + rows, n_rows)) for start in range(0, n_rows, rows)]
+
+    def compute(self, image: np.ndarray, indices: Optional[Sequence[str]] = None,
+                out: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+        """Same contract as ``VegetationIndexEngine.compute``, split into parallel stripes."""
+        if image.shape[0] < 4:
+            raise ValueError("Image must have at least 4 bands (B, G, R, NIR)")
+
+        shape = tuple(image.shape[1:])
+        n_pixels = int(np.prod(shape, dtype=np.int64))
+        if self.workers <= 1 or n_pixels < self.min_pixels or not shape or shape[0] < 2:
+            return self._engine().compute(image, indices=indices, out=out)
+
+        names = self.resolve(image.shape[0], indices)
+        out = dict(out) if out else {}
+        for name in names:
+            if name not in out:
+                out[name] = np.empty(shape, dtype=np.float32)
+
+        def compute_stripe(start: int, stop: int):
+            self._engine().compute(image[:, start:stop], indices=names,
+                                   out={name: out[name][start:stop] for name in names})
+
+        # Collect every stripe so worker exceptions propagate
+        futures = [self.pool.submit(compute_stripe, start, stop) for start, stop in self.stripes(shape)]
+        for future in futures:
+            future.result()
+        return {name: out[name] for name in names}
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+_local = threading.local()
+_parallel_engines: Dict[Tuple[int, int], ParallelIndexEngine] = {}
+_parallel_engines_lock = threading.Lock()
+
+
+def compute_vegetation_indices(image: np.ndarray, indices: Optional[Sequence[str]] = None,
+                               workers: int = 1, chunk_pixels: int = 512 * 1024) -> Dict[str, np.ndarray]:
+    """Compute indices with a per-thread engine; picklable entry point for worker pools.
+
+    With ``workers`` > 1 large inputs are split into row stripes over a thread pool
+    shared per process.
+    """
+    if workers > 1:
+        with _parallel_engines_lock:
+            engine = _parallel_engines.get((workers, chunk_pixels))
+            if engine is None:
+                engine = _parallel_engines[(workers, chunk_pixels)] = ParallelIndexEngine(
+                    workers=workers, chunk_pixels=chunk_pixels
+                )
+        return engine.compute(image, indices=indices)
+
+    engine = getattr(_local, 'engine', None)
+    if engine is None:
+        engine = _local.engine = VegetationIndexEngine()
+    return engine.compute(image, indices=indices)
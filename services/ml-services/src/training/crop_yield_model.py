@@ -9,97 +9,74 @@ from sklearn.model_selection import train_test_split, GridSearchCV, TimeSeriesSp
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-import xgboost as xgb
-import lightgbm as lgb
-from tensorflow import keras
-from tensorflow.keras import layers
-import optuna
 import joblib
-import mlflow
-import mlflow.sklearn
-import mlflow.tensorflow
 from typing import Dict, List, Tuple, Any
+import copy
 import logging
+import time
+from functools import partial
 from pathlib import Path
 
+from src.lazy_imports import lazy_import
+from src.training.ensemble_executor import EnsembleExecutor, member_predict
+from src.training.feature_engineering import YieldFeatureEngine
+from src.training.hyperparameter_search import HyperparameterSearch, build_model
+from src.training.training_orchestrator import TrainingOrchestrator
+from src.training.inference_pipeline import CompiledInferencePipeline
+from src.training.online_features import OnlineFeatureStore
+
+# Training and model backends load on first use, so inference-only workers that
+# never touch them (or only some of them) start quickly
+xgb = lazy_import('xgboost')
+lgb = lazy_import('lightgbm')
+tf = lazy_import('tensorflow')
+keras = lazy_import('tensorflow', 'keras')
+optuna = lazy_import('optuna')
+mlflow = lazy_import('mlflow')
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# MLflow metric prefixes of each model family in the parent training run
+METRIC_PREFIXES = {'xgboost': 'xgb', 'lightgbm': 'lgb', 'random_forest': 'rf', 'neural_network': 'nn'}
+
 class CropYieldPredictor:
     """Advanced crop yield prediction model with multiple algorithms and hyperparameter optimization."""
     
-    def __init__(self, model_path: str = "models/crop_yield"):
+    def __init__(self, model_path: str = "models/crop_yield", ensemble_config: Dict[str, Any] = None,
+                 search_config: Dict[str, Any] = None, training_config: Dict[str, Any] = None):
         self.model_path = Path(model_path)
         self.model_path.mkdir(parents=True, exist_ok=True)
         
         self.scaler = StandardScaler()
         self.label_encoder = LabelEncoder()
+        self.feature_engine = YieldFeatureEngine()
+        self.online_features = OnlineFeatureStore(self.feature_engine)
+        self.feature_columns = None
+        self.inference_pipeline = None
+        self.ensemble_executor = EnsembleExecutor.from_config(ensemble_config or {})
+        self.search = HyperparameterSearch.from_config(search_config or {}, storage_dir=self.model_path)
+        self.orchestrator = TrainingOrchestrator.from_config(
+            training_config or {}, trainer=partial(train_model_family, search=self.search),
+            artifact_dir=self.model_path / 'staging'
+        )
         self.models = {}
         self.best_model = None
         self.feature_importance = None
         
-    def prepare_features(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Advanced feature engineering for crop yield prediction."""
-        
-        # Create a copy to avoid modifying original data
-        df = data.copy()
-        
-        # Temporal features
-        df['planting_month'] = pd.to_datetime(df['planting_date']).dt.month
-        df['planting_season'] = df['planting_month'].map({
-            12: 'winter', 1: 'winter', 2: 'winter',
-            3: 'spring', 4: 'spring', 5: 'spring',
-            6: 'summer', 7: 'summer', 8: 'summer',
-            9: 'autumn', 10: 'autumn', 11: 'autumn'
-        })
-        
-        # Growing degree days calculation
-        df['gdd'] = np.maximum(0, (df['avg_temperature'] - df['base_temperature']))
-        df['cumulative_gdd'] = df.groupby('farm_id')['gdd'].cumsum()
-        
-        # Precipitation features
-        df['rainfall_lag_7'] = df.groupby('farm_id')['rainfall'].rolling(7).sum().reset_index(0, drop=True)
-        df['rainfall_lag_30'] = df.groupby('farm_id')['rainfall'].rolling(30).sum().reset_index(0, drop=True)
-        df['rainfall_variance'] = df.groupby('farm_id')['rainfall'].rolling(30).var().reset_index(0, drop=True)
-        
-        # Drought stress indicator
-        df['drought_stress'] = (df['rainfall_lag_30'] < df['rainfall_lag_30'].quantile(0.2)).astype(int)
-        
-        # Vegetation indices interactions
-        df['ndvi_evi_ratio'] = df['ndvi'] / (df['evi'] + 1e-6)
-        df['ndvi_trend'] = df.groupby('farm_id')['ndvi'].pct_change(periods=7)
-        df['vegetation_health_index'] = (df['ndvi'] + df['evi'] + df['savi']) / 3
-        
-        # Soil health composite score
-        soil_features = ['soil_organic_carbon', 'soil_ph', 'soil_nitrogen', 'soil_phosphorus', 'soil_potassium']
-        df['soil_health_score'] = df[soil_features].fillna(0).sum(axis=1) / len(soil_features)
+    def prepare_features(self, data: pd.DataFrame, fit: bool = False, encode: bool = True) -> pd.DataFrame:
+        """Advanced feature engineering for crop yield prediction.
         
-        # Weather stress indicators
-        df['heat_stress'] = (df['max_temperature'] > 35).astype(int)
-        df['cold_stress'] = (df['min_temperature'] < 10).astype(int)
-        df['humidity_stress'] = ((df['humidity'] < 30) | (df['humidity'] > 90)).astype(int)
-        
-        # Input efficiency ratios
-        df['fertilizer_efficiency'] = df['yield'] / (df['fertilizer_nitrogen'] + df['fertilizer_phosphorus'] + df['fertilizer_potassium'] + 1)
-        df['water_use_efficiency'] = df['yield'] / (df['irrigation_amount'] + df['rainfall_lag_30'] + 1)
-        
-        # Regional and variety adjustments
-        df = pd.get_dummies(df, columns=['crop_variety', 'soil_type', 'irrigation_method'], prefix_sep='_')
-        
-        # Historical yield features
-        df['yield_lag_1'] = df.groupby('farm_id')['yield'].shift(1)
-        df['yield_lag_2'] = df.groupby('farm_id')['yield'].shift(2)
-        df['yield_trend'] = df.groupby('farm_id')['yield'].rolling(3).mean().reset_index(0, drop=True)
-        
-        # Market and economic indicators
-        df['price_yield_ratio'] = df['market_price'] / (df['yield'] + 1e-6)
-        df['profit_margin'] = (df['market_price'] * df['yield']) - df['total_cost']
-        
-        return df
+        Rows of each farm are taken in chronological order; see ``YieldFeatureEngine``.
+        ``fit`` keeps this data's drought threshold for online feature rows.
+        """
+        return self.feature_engine.transform(data, fit=fit, encode=encode)
     
-    def create_neural_network(self, input_dim: int) -> keras.Model:
+    @staticmethod
+    def create_neural_network(input_dim: int) -> 'keras.Model':
         """Create advanced neural network for yield prediction."""
+        layers = keras.layers
         
         model = keras.Sequential([
             layers.Dense(512, activation='relu', input_shape=(input_dim,)),
@@ -129,63 +106,9 @@ class CropYieldPredictor:
     
     def optimize_hyperparameters(self, X_train: np.ndarray, y_train: np.ndarray, 
                                 model_type: str) -> Dict[str, Any]:
-        """Hyperparameter optimization using Optuna."""
-        
-        def objective(trial):
-            if model_type == 'xgboost':
-                params = {
-                    'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
-                    'max_depth': trial.suggest_int('max_depth', 3, 12),
-                    'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3),
-                    'subsample': trial.suggest_float('subsample', 0.6, 1.0),
-                    'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
-                    'reg_alpha': trial.suggest_float('reg_alpha', 0, 10),
-                    'reg_lambda': trial.suggest_float('reg_lambda', 0, 10),
-                }
-                model = xgb.XGBRegressor(**params, random_state=42)
-                
-            elif model_type == 'lightgbm':
-                params = {
-                    'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
-                    'max_depth': trial.suggest_int('max_depth', 3, 12),
-                    'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3),
-                    'num_leaves': trial.suggest_int('num_leaves', 10, 300),
-                    'subsample': trial.suggest_float('subsample', 0.6, 1.0),
-                    'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
-                    'reg_alpha': trial.suggest_float('reg_alpha', 0, 10),
-                    'reg_lambda': trial.suggest_float('reg_lambda', 0, 10),
-                }
-                model = lgb.LGBMRegressor(**params, random_state=42, verbose=-1)
-                
-            elif model_type == 'random_forest':
-                params = {
-                    'n_estimators': trial.suggest_int('n_estimators', 100, 500),
-                    'max_depth': trial.suggest_int('max_depth', 5, 20),
-                    'min_samples_split': trial.suggest_int('min_samples_split', 2, 20),
-                    'min_samples_leaf': trial.suggest_int('min_samples_leaf', 1, 10),
-                    'max_features': trial.suggest_categorical('max_features', ['sqrt', 'log2', None]),
-                }
-                model = RandomForestRegressor(**params, random_state=42)
-            
-            # Time series cross-validation
-            tscv = TimeSeriesSplit(n_splits=5)
-            scores = []
-            
-            for train_idx, val_idx in tscv.split(X_train):
-                X_fold_train, X_fold_val = X_train[train_idx], X_train[val_idx]
-                y_fold_train, y_fold_val = y_train[train_idx], y_train[val_idx]
-                
-                model.fit(X_fold_train, y_fold_train)
-                y_pred = model.predict(X_fold_val)
-                rmse = np.sqrt(mean_squared_error(y_fold_val, y_pred))
-                scores.append(rmse)
-            
-            return np.mean(scores)
-        
-        study = optuna.create_study(direction='minimize')
-        study.optimize(objective, n_trials=100)
+        """Hyperparameter optimization using Optuna (see ``HyperparameterSearch``)."""
         
-        return study.best_params
+        return self.search.optimize(X_train, y_train, model_type)
     
     def train_models(self, data: pd.DataFrame, target_column: str = 'yield'):
         """Train multiple models and select the best one."""
@@ -193,7 +116,7 @@ class CropYieldPredictor:
         logger.info("Starting model training pipeline...")
         
         # Prepare features
-        df = self.prepare_features(data)
+        df = self.prepare_features(data, fit=True)
         
         # Separate features and target
         feature_columns = [col for col in df.columns if col not in [
@@ -223,97 +146,26 @@ class CropYieldPredictor:
             
             model_results = {}
             
-            # Train XGBoost
-            logger.info("Training XGBoost model...")
-            xgb_params = self.optimize_hyperparameters(X_train, y_train, 'xgboost')
-            xgb_model = xgb.XGBRegressor(**xgb_params, random_state=42)
-            xgb_model.fit(X_train, y_train)
-            xgb_pred = xgb_model.predict(X_test)
-            xgb_rmse = np.sqrt(mean_squared_error(y_test, xgb_pred))
-            xgb_r2 = r2_score(y_test, xgb_pred)
-            
-            model_results['xgboost'] = {
-                'model': xgb_model,
-                'rmse': xgb_rmse,
-                'r2': xgb_r2,
-                'predictions': xgb_pred
-            }
-            
-            mlflow.log_metric("xgb_rmse", xgb_rmse)
-            mlflow.log_metric("xgb_r2", xgb_r2)
-            
-            # Train LightGBM
-            logger.info("Training LightGBM model...")
-            lgb_params = self.optimize_hyperparameters(X_train, y_train, 'lightgbm')
-            lgb_model = lgb.LGBMRegressor(**lgb_params, random_state=42, verbose=-1)
-            lgb_model.fit(X_train, y_train)
-            lgb_pred = lgb_model.predict(X_test)
-            lgb_rmse = np.sqrt(mean_squared_error(y_test, lgb_pred))
-            lgb_r2 = r2_score(y_test, lgb_pred)
-            
-            model_results['lightgbm'] = {
-                'model': lgb_model,
-                'rmse': lgb_rmse,
-                'r2': lgb_r2,
-                'predictions': lgb_pred
-            }
-            
-            mlflow.log_metric("lgb_rmse", lgb_rmse)
-            mlflow.log_metric("lgb_r2", lgb_r2)
-            
-            # Train Random Forest
-            logger.info("Training Random Forest model...")
-            rf_params = self.optimize_hyperparameters(X_train, y_train, 'random_forest')
-            rf_model = RandomForestRegressor(**rf_params, random_state=42)
-            rf_model.fit(X_train, y_train)
-            rf_pred = rf_model.predict(X_test)
-            rf_rmse = np.sqrt(mean_squared_error(y_test, rf_pred))
-            rf_r2 = r2_score(y_test, rf_pred)
-            
-            model_results['random_forest'] = {
-                'model': rf_model,
-                'rmse': rf_rmse,
-                'r2': rf_r2,
-                'predictions': rf_pred
-            }
-            
-            mlflow.log_metric("rf_rmse", rf_rmse)
-            mlflow.log_metric("rf_r2", rf_r2)
-            
-            # Train Neural Network
-            logger.info("Training Neural Network model...")
-            nn_model = self.create_neural_network(X_train.shape[1])
-            
-            early_stopping = keras.callbacks.EarlyStopping(
-                monitor='val_loss', patience=50, restore_best_weights=True
-            )
-            
-            reduce_lr = keras.callbacks.ReduceLROnPlateau(
-                monitor='val_loss', factor=0.5, patience=25, min_lr=1e-6
-            )
-            
-            history = nn_model.fit(
-                X_train, y_train,
-                validation_split=0.2,
-                epochs=200,
-                batch_size=32,
-                callbacks=[early_stopping, reduce_lr],
-                verbose=0
-            )
+            # Tune and fit the model families as independent jobs
+            family_results = self.orchestrator.run(X_train, np.asarray(y_train), X_test, np.asarray(y_test))
             
-            nn_pred = nn_model.predict(X_test).flatten()
-            nn_rmse = np.sqrt(mean_squared_error(y_test, nn_pred))
-            nn_r2 = r2_score(y_test, nn_pred)
-            
-            model_results['neural_network'] = {
-                'model': nn_model,
-                'rmse': nn_rmse,
-                'r2': nn_r2,
-                'predictions': nn_pred
-            }
-            
-            mlflow.log_metric("nn_rmse", nn_rmse)
-            mlflow.log_metric("nn_r2", nn_r2)
+            for name, result in family_results.items():
+                model_results[name] = {
+                    'model': result['model'],
+                    'rmse': result['rmse'],
+                    'r2': result['r2'],
+                    'predictions': result['predictions']
+                }
+                
+                with mlflow.start_run(run_name=name, nested=True):
+                    mlflow.log_params(result['params'])
+                    mlflow.log_param("threads", result['threads'])
+                    mlflow.log_metric("rmse", result['rmse'])
+                    mlflow.log_metric("r2", result['r2'])
+                    mlflow.log_metric("train_seconds", result['seconds'])
+                
+                mlflow.log_metric(f"{METRIC_PREFIXES[name]}_rmse", result['rmse'])
+                mlflow.log_metric(f"{METRIC_PREFIXES[name]}_r2", result['r2'])
             
             # Ensemble model (weighted average based on performance)
             weights = {}
@@ -370,6 +222,11 @@ class CropYieldPredictor:
         
         # Save feature columns
         joblib.dump(feature_columns, self.model_path / 'feature_columns.pkl')
+        self.feature_columns = feature_columns
+        self.compile_inference_pipeline()
+        
+        # Save the fitted feature engine (training drought threshold for online rows)
+        joblib.dump(self.feature_engine, self.model_path / 'feature_engine.pkl')
         
         # Save individual models
         for name, result in self.models.items():
@@ -389,7 +246,13 @@ class CropYieldPredictor:
         
         try:
             self.scaler = joblib.load(self.model_path / 'scaler.pkl')
-            feature_columns = joblib.load(self.model_path / 'feature_columns.pkl')
+            self.feature_columns = joblib.load(self.model_path / 'feature_columns.pkl')
+            self.compile_inference_pipeline()
+            
+            engine_path = self.model_path / 'feature_engine.pkl'
+            if engine_path.exists():
+                self.feature_engine = joblib.load(engine_path)
+                self.online_features.engine = self.feature_engine
             
             # Load individual models
             model_files = {
@@ -419,32 +282,50 @@ class CropYieldPredictor:
             logger.error(f"Error loading models: {e}")
             return False
     
+    def compile_inference_pipeline(self) -> CompiledInferencePipeline:
+        """Freeze the feature layout and fitted scaler used by ``predict`` and ``predict_online``."""
+        
+        if self.feature_columns is None:
+            self.feature_columns = joblib.load(self.model_path / 'feature_columns.pkl')
+        self.inference_pipeline = CompiledInferencePipeline.compile(self.feature_columns, self.scaler)
+        return self.inference_pipeline
+    
     def predict(self, data: pd.DataFrame, use_ensemble: bool = True) -> np.ndarray:
         """Make predictions using the trained model(s)."""
         
         if not self.models:
             raise ValueError("No trained models available. Please train or load models first.")
         
-        # Prepare features
-        df = self.prepare_features(data)
-        feature_columns = joblib.load(self.model_path / 'feature_columns.pkl')
+        pipeline = self.inference_pipeline or self.compile_inference_pipeline()
         
-        X = df[feature_columns].fillna(0)
-        X_scaled = self.scaler.transform(X)
+        # Prepare features; categories are encoded by the pipeline's frozen mapping
+        df = self.prepare_features(data, encode=False)
+        X_scaled = pipeline.transform(df)
+        
+        return self._predict_scaled(X_scaled, use_ensemble)
+    
+    def predict_online(self, record: Dict[str, Any], use_ensemble: bool = True) -> float:
+        """Predict one new observation from its farm's incremental feature state.
+        
+        The record is folded into ``online_features`` (seed it with ``bootstrap`` from
+        history first); records of a farm must arrive in chronological order.
+        """
+        
+        if not self.models:
+            raise ValueError("No trained models available. Please train or load models first.")
+        
+        pipeline = self.inference_pipeline or self.compile_inference_pipeline()
+        row = self.online_features.update(record, encode=False)
+        X_scaled = pipeline.transform(row)
+        
+        return float(self._predict_scaled(X_scaled, use_ensemble)[0])
+    
+    def _predict_scaled(self, X_scaled: np.ndarray, use_ensemble: bool) -> np.ndarray:
+        """Model or ensemble output for an already scaled feature matrix."""
         
         if use_ensemble and hasattr(self, 'ensemble_weights'):
-            # Ensemble prediction
-            predictions = np.zeros(X_scaled.shape[0])
-            
-            for name, weight in self.ensemble_weights.items():
-                if name in self.models:
-                    if name == 'neural_network':
-                        pred = self.models[name].predict(X_scaled).flatten()
-                    else:
-                        pred = self.models[name].predict(X_scaled)
-                    predictions += weight * pred
-            
-            return predictions
+            # Ensemble prediction, members evaluated concurrently
+            return self.ensemble_executor.predict(self.models, self.ensemble_weights, X_scaled)
         else:
             # Use best single model
             if hasattr(self, 'best_model') and self.best_model:
@@ -455,10 +336,77 @@ class CropYieldPredictor:
             else:
                 # Use first available model
                 model_name, model = next(iter(self.models.items()))
-                if model_name == 'neural_network':
-                    return model.predict(X_scaled).flatten()
-                else:
-                    return model.predict(X_scaled)
+                return member_predict(model_name, model, X_scaled)
+    
+    def shutdown(self):
+        """Release the ensemble member thread pool."""
+        self.ensemble_executor.shutdown()
+
+def train_model_family(family: str, X_train: np.ndarray, y_train: np.ndarray, X_test: np.ndarray,
+                       y_test: np.ndarray, threads: int, artifact_dir: Path,
+                       search: HyperparameterSearch = None) -> Dict[str, Any]:
+    """Tune, fit and evaluate one model family; the training job run by ``TrainingOrchestrator``."""
+    
+    start = time.perf_counter()
+    artifact_dir = Path(artifact_dir)
+    params = {}
+    
+    if family == 'neural_network':
+        logger.info("Training Neural Network model...")
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(threads)
+            tf.config.threading.set_inter_op_parallelism_threads(threads)
+        except RuntimeError:
+            # TensorFlow is already initialised in this process; keep its pools
+            pass
+        
+        model = CropYieldPredictor.create_neural_network(X_train.shape[1])
+        
+        early_stopping = keras.callbacks.EarlyStopping(
+            monitor='val_loss', patience=50, restore_best_weights=True
+        )
+        
+        reduce_lr = keras.callbacks.ReduceLROnPlateau(
+            monitor='val_loss', factor=0.5, patience=25, min_lr=1e-6
+        )
+        
+        model.fit(
+            X_train, y_train,
+            validation_split=0.2,
+            epochs=200,
+            batch_size=32,
+            callbacks=[early_stopping, reduce_lr],
+            verbose=0
+        )
+        
+        predictions = model.predict(X_test).flatten()
+        artifact = artifact_dir / f'{family}_model.h5'
+        model.save(artifact)
+    else:
+        logger.info(f"Training {family} model...")
+        search = copy.copy(search or HyperparameterSearch())
+        # Parallel trial workers share this job's core budget rather than each taking all of it
+        search.n_jobs = max(1, min(search.n_jobs, threads))
+        search.threads = max(1, threads // search.n_jobs)
+        params = search.optimize(X_train, y_train, family)
+        
+        model = build_model(family, params)
+        model.set_params(n_jobs=threads)
+        model.fit(X_train, y_train)
+        
+        predictions = model.predict(X_test)
+        artifact = artifact_dir / f'{family}_model.pkl'
+        joblib.dump(model, artifact)
+    
+    return {
+        'rmse': np.sqrt(mean_squared_error(y_test, predictions)),
+        'r2': r2_score(y_test, predictions),
+        'predictions': predictions,
+        'params': params,
+        'threads': threads,
+        'seconds': time.perf_counter() - start,
+        'artifact': str(artifact)
+    }
 
 def main():
     """Main training function."""
@@ -0,0 +1,190 @@
+"""
+Ensemble Executor
+Concurrent evaluation of weighted ensemble members with timeouts and latency metrics
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def member_predict(name: str, model: Any, X: np.ndarray) -> np.ndarray:
+    """One member's predictions as a 1-D array (the Keras network returns a column)."""
+    if name == 'neural_network':
+        return model.predict(X).flatten()
+    return model.predict(X)
+
+
+class MemberStats:
+    """Call, timeout and latency counters for one ensemble member."""
+
+    def __init__(self, window: int):
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.latencies: deque = deque(maxlen=window)
+
+    def summary(self) -> Dict[str, float]:
+        latencies = np.array(self.latencies, dtype=np.float64) * 1000
+        summary = {'calls': self.calls, 'timeouts': self.timeouts, 'errors': self.errors}
+        if latencies.size:
+            summary.update({
+                'last_ms': float(latencies[-1]),
+                'mean_ms': float(latencies.mean()),
+                'p50_ms': float(np.percentile(latencies, 50)),
+                'p99_ms': float(np.percentile(latencies, 99)),
+            })
+        return summary
+
+
+class EnsembleExecutor:
+    """Runs ensemble members concurrently on a persistent thread pool.
+
+    XGBoost, LightGBM, scikit-learn forests and Keras release the GIL while they
+    predict, so members overlap and a call takes about as long as its slowest
+    member. Members whose weight is below ``min_weight`` are skipped. Members that
+    miss ``member_timeout`` seconds are left out of the result, and the remaining
+    weights are rescaled to the full weight of the eligible members. When every
+    member answers, the result equals the sequential weighted sum. A late member
+    keeps its thread until it finishes, since threads cannot be interrupted, so the
+    pool is replaced after a timeout and later calls never queue behind it.
+    """
+
+    def __init__(self, workers: Optional[int] = None, member_timeout: Optional[float] = None,
+                 min_weight: float = 0.0, stats_window: int = 1024):
+        self.workers = workers
+        self.member_timeout = member_timeout
+        self.min_weight = min_weight
+        self.stats_window = stats_window
+        self.stats: Dict[str, MemberStats] = {}
+        self._stats_lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'EnsembleExecutor':
+        """Build an executor from an ``ensemble`` config section."""
+        return cls(
+            workers=config.get('workers'),
+            member_timeout=config.get('member_timeout'),
+            min_weight=config.get('min_weight', 0.0),
+            stats_window=config.get('stats_window', 1024)
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Pools and locks are rebuilt in the receiving process; metrics stay local
+        state = self.__dict__.copy()
+        state.update({'_pool': None, '_pool_lock': None, '_stats_lock': None, 'stats': {}})
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def pool(self, members: int) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers or max(members, 1),
+                                                    thread_name_prefix='ensemble-member')
+        return self._pool
+
+    def _retire_pool(self, pool: ThreadPoolExecutor):
+        """Stop handing work to a pool with a late member; its threads exit once they finish."""
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def members(self, models: Dict[str, Any], weights: Dict[str, float]) -> List[Tuple[str, float]]:
+        """Loaded members with at least ``min_weight`` weight, in ``weights`` order."""
+        return [(name, weight) for name, weight in weights.items()
+                if name in models and abs(weight) >= self.min_weight]
+
+    def predict(self, models: Dict[str, Any], weights: Dict[str, float], X: np.ndarray) -> np.ndarray:
+        """Weighted sum of member predictions for ``X``."""
+        eligible = [(name, weight) for name, weight in weights.items() if name in models]
+        members = self.members(models, weights)
+        if not members:
+            raise ValueError("No ensemble members available for prediction")
+
+        if len(members) == 1:
+            name, weight = members[0]
+            outputs = {name: self._timed(name, models[name], X)}
+        else:
+            outputs = self._run_concurrently(members, models, X)
+        if not outputs:
+            raise TimeoutError(f"No ensemble member answered within {self.member_timeout}s")
+
+        predictions = np.zeros(X.shape[0])
+        used_weight = 0.0
+        for name, weight in members:
+            if name in outputs:
+                predictions += weight * outputs[name]
+                used_weight += weight
+
+        total_weight = sum(weight for _, weight in eligible)
+        if used_weight != total_weight and used_weight:
+            # Dropped or late members: keep the output on the scale of the full ensemble
+            predictions *= total_weight / used_weight
+        return predictions
+
+    def _run_concurrently(self, members: List[Tuple[str, float]], models: Dict[str, Any],
+                          X: np.ndarray) -> Dict[str, np.ndarray]:
+        pool = self.pool(len(members))
+        futures = {pool.submit(self._timed, name, models[name], X): name for name, _ in members}
+        _, pending = wait(futures, timeout=self.member_timeout)
+
+        if pending:
+            self._retire_pool(pool)
+
+        # A failed member fails the call, as in sequential evaluation
+        outputs = {}
+        for future, name in futures.items():
+            if future in pending:
+                future.cancel()
+                self._record(name, timeout=True)
+                logger.warning(f"Ensemble member {name} exceeded {self.member_timeout}s; leaving it out")
+                continue
+            outputs[name] = future.result()
+        return outputs
+
+    def _timed(self, name: str, model: Any, X: np.ndarray) -> np.ndarray:
+        start = time.perf_counter()
+        try:
+            return member_predict(name, model, X)
+        except Exception:
+            self._record(name, error=True)
+            raise
+        finally:
+            self._record(name, latency=time.perf_counter() - start)
+
+    def _record(self, name: str, latency: Optional[float] = None, timeout: bool = False, error: bool = False):
+        with self._stats_lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = MemberStats(self.stats_window)
+            if latency is not None:
+                stats.calls += 1
+                stats.latencies.append(latency)
+            stats.timeouts += int(timeout)
+            stats.errors += int(error)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Per-member call counts, timeouts, errors and recent latency percentiles."""
+        with self._stats_lock:
+            return {name: stats.summary() for name, stats in self.stats.items()}
+
+    def shutdown(self, wait: bool = True):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
@@ -0,0 +1,322 @@
+"""
+Hyperparameter Search
+Pruned, time-budgeted and optionally multi-process Optuna search for yield model families
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import TimeSeriesSplit
+
+from src.lazy_imports import lazy_import
+
+xgb = lazy_import('xgboost')
+lgb = lazy_import('lightgbm')
+optuna = lazy_import('optuna')
+
+logger = logging.getLogger(__name__)
+
+MODEL_FAMILIES = ('xgboost', 'lightgbm', 'random_forest')
+PRUNERS = ('median', 'hyperband', 'none')
+BOOSTED_FAMILIES = ('xgboost', 'lightgbm')
+
+
+def suggest_params(trial, model_type: str) -> Dict[str, Any]:
+    """Search space of each model family."""
+    if model_type == 'xgboost':
+        return {
+            'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
+            'max_depth': trial.suggest_int('max_depth', 3, 12),
+            'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3),
+            'subsample': trial.suggest_float('subsample', 0.6, 1.0),
+            'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
+            'reg_alpha': trial.suggest_float('reg_alpha', 0, 10),
+            'reg_lambda': trial.suggest_float('reg_lambda', 0, 10),
+        }
+    if model_type == 'lightgbm':
+        return {
+            'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
+            'max_depth': trial.suggest_int('max_depth', 3, 12),
+            'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3),
+            'num_leaves': trial.suggest_int('num_leaves', 10, 300),
+            'subsample': trial.suggest_float('subsample', 0.6, 1.0),
+            'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
+            'reg_alpha': trial.suggest_float('reg_alpha', 0, 10),
+            'reg_lambda': trial.suggest_float('reg_lambda', 0, 10),
+        }
+    if model_type == 'random_forest':
+        return {
+            'n_estimators': trial.suggest_int('n_estimators', 100, 500),
+            'max_depth': trial.suggest_int('max_depth', 5, 20),
+            'min_samples_split': trial.suggest_int('min_samples_split', 2, 20),
+            'min_samples_leaf': trial.suggest_int('min_samples_leaf', 1, 10),
+            'max_features': trial.suggest_categorical('max_features', ['sqrt', 'log2', None]),
+        }
+    raise ValueError(f"Unknown model type: {model_type}")
+
+
+def build_model(model_type: str, params: Dict[str, Any]):
+    """Estimator of a model family with the training pipeline's fixed settings."""
+    if model_type == 'xgboost':
+        return xgb.XGBRegressor(**params, random_state=42)
+    if model_type == 'lightgbm':
+        return lgb.LGBMRegressor(**params, random_state=42, verbose=-1)
+    if model_type == 'random_forest':
+        return RandomForestRegressor(**params, random_state=42)
+    raise ValueError(f"Unknown model type: {model_type}")
+
+
+class CVFolds:
+    """Time-series CV folds materialised once per study.
+
+    TimeSeriesSplit folds are contiguous row ranges. Each fold is therefore a pair of
+    views into one C-contiguous float32 copy of the training matrix, and trials never
+    slice or copy per fold. The float32 copy is what the tree libraries train on
+    anyway. Native XGBoost ``QuantileDMatrix`` and LightGBM ``Dataset`` objects are
+    built on first use and then shared by every trial. Each validation set is built
+    against its training set's bins. Native objects stay in the process that built
+    them; pickling keeps only the arrays.
+    """
+
+    def __init__(self, X: np.ndarray, y: np.ndarray, n_splits: int):
+        self.X = np.ascontiguousarray(X, dtype=np.float32)
+        self.y = np.ascontiguousarray(y, dtype=np.float64)
+        self.bounds = []
+        for train_idx, val_idx in TimeSeriesSplit(n_splits=n_splits).split(self.X):
+            if train_idx[0] != 0 or val_idx[0] != train_idx[-1] + 1 or val_idx[-1] != val_idx[0] + len(val_idx) - 1:
+                raise ValueError("Expected contiguous time-series folds")
+            self.bounds.append((len(train_idx), int(val_idx[-1]) + 1))
+        self._native: Dict[Any, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.bounds)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state['_native'] = {}
+        return state
+
+    def fold(self, step: int):
+        """``(X_train, y_train, X_val, y_val)`` views of fold ``step``."""
+        train_end, val_end = self.bounds[step]
+        return self.X[:train_end], self.y[:train_end], self.X[train_end:val_end], self.y[train_end:val_end]
+
+    def xgb_data(self, step: int):
+        key = ('xgboost', step)
+        if key not in self._native:
+            X_train, y_train, X_val, y_val = self.fold(step)
+            dtrain = xgb.QuantileDMatrix(X_train, y_train)
+            self._native[key] = (dtrain, xgb.QuantileDMatrix(X_val, y_val, ref=dtrain))
+        return self._native[key]
+
+    def lgb_data(self, step: int):
+        key = ('lightgbm', step)
+        if key not in self._native:
+            X_train, y_train, X_val, y_val = self.fold(step)
+            train_set = lgb.Dataset(X_train, y_train, params={'verbose': -1}, free_raw_data=False).construct()
+            val_set = lgb.Dataset(X_val, y_val, reference=train_set, free_raw_data=False).construct()
+            self._native[key] = (train_set, val_set)
+        return self._native[key]
+
+
+class HyperparameterSearch:
+    """Optuna search over one model family with per-fold pruning and a time budget.
+
+    Each trial reports the RMSE of every TimeSeriesSplit fold as an intermediate
+    value, so the median or hyperband pruner stops weak trials after their first
+    folds. ``time_budget`` caps the wall-clock seconds per family (a number, or a
+    mapping from family to seconds). With ``n_jobs > 1`` the trials run in worker
+    processes sharing a SQLite study under ``storage_dir``. Boosted families train
+    natively on the study's ``CVFolds`` with validation early stopping, so
+    ``n_estimators`` is an upper bound. The best trial's mean stopping round
+    replaces it in the returned parameters. With ``n_jobs=1`` and a
+    ``seed``, the sampler and pruner are deterministic and so are the best
+    parameters; parallel workers use seeds derived from it and each run an equal
+    share of ``n_trials``, but their trial interleaving is not reproducible.
+    """
+
+    def __init__(self, n_trials: int = 100, n_splits: int = 5, n_jobs: int = 1,
+                 seed: Optional[int] = None, pruner: str = 'median',
+                 time_budget: Union[None, float, Dict[str, float]] = None,
+                 storage_dir: Optional[Path] = None, early_stopping_rounds: int = 50,
+                 threads: Optional[int] = None):
+        if pruner not in PRUNERS:
+            raise ValueError(f"Unsupported pruner: {pruner}")
+        self.n_trials = n_trials
+        self.n_splits = n_splits
+        self.n_jobs = n_jobs if n_jobs and n_jobs > 0 else (os.cpu_count() or 1)
+        self.seed = seed
+        self.pruner = pruner
+        self.time_budget = time_budget
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+        self.early_stopping_rounds = early_stopping_rounds
+        # Threads per fit; parallel workers split the cores between them by default
+        self.threads = threads or (max(1, (os.cpu_count() or 1) // self.n_jobs) if self.n_jobs > 1 else None)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], storage_dir: Optional[Path] = None) -> 'HyperparameterSearch':
+        """Build a search from a ``search`` config section."""
+        return cls(
+            n_trials=config.get('n_trials', 100),
+            n_splits=config.get('n_splits', 5),
+            n_jobs=config.get('n_jobs', 1),
+            seed=config.get('seed'),
+            pruner=config.get('pruner', 'median'),
+            time_budget=config.get('time_budget'),
+            storage_dir=config.get('storage_dir', storage_dir),
+            early_stopping_rounds=config.get('early_stopping_rounds', 50),
+            threads=config.get('threads')
+        )
+
+    def budget(self, model_type: str) -> Optional[float]:
+        if isinstance(self.time_budget, dict):
+            return self.time_budget.get(model_type)
+        return self.time_budget
+
+    def make_pruner(self):
+        if self.pruner == 'median':
+            return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=1)
+        if self.pruner == 'hyperband':
+            return optuna.pruners.HyperbandPruner(min_resource=1, max_resource=self.n_splits)
+        return optuna.pruners.NopPruner()
+
+    def make_sampler(self, worker: int = 0):
+        seed = None if self.seed is None else self.seed + worker
+        return optuna.samplers.TPESampler(seed=seed)
+
+    def objective(self, folds: CVFolds, model_type: str, deadline: Optional[float] = None):
+        """Mean time-series CV RMSE of a trial, reporting each fold for pruning.
+
+        Past ``deadline`` (epoch seconds), a running trial stops at its next fold once
+        the study has a completed trial, so budgets hold at fold granularity.
+        """
+
+        def objective(trial):
+            params = suggest_params(trial, model_type)
+            scores = []
+            rounds = []
+
+            for step in range(len(folds)):
+                rmse, fold_rounds = self.fit_fold(folds, step, model_type, params)
+                scores.append(rmse)
+                rounds.append(fold_rounds)
+
+                trial.report(rmse, step)
+                if trial.should_prune() or _out_of_time(trial, deadline):
+                    raise optuna.TrialPruned()
+
+            if model_type in BOOSTED_FAMILIES:
+                trial.set_user_attr('n_estimators', int(round(np.mean(rounds))))
+            return np.mean(scores)
+
+        return objective
+
+    def fit_fold(self, folds: CVFolds, step: int, model_type: str, params: Dict[str, Any]):
+        """Validation RMSE of one fold and the number of boosting rounds used."""
+        X_train, y_train, X_val, y_val = folds.fold(step)
+        params = dict(params)
+        n_estimators = params.pop('n_estimators')
+
+        if model_type == 'xgboost':
+            dtrain, dval = folds.xgb_data(step)
+            native = {**params, 'objective': 'reg:squarederror', 'seed': 42}
+            if self.threads:
+                native['nthread'] = self.threads
+            booster = xgb.train(native, dtrain, num_boost_round=n_estimators, evals=[(dval, 'validation')],
+                                early_stopping_rounds=self.early_stopping_rounds, verbose_eval=False)
+            rounds = booster.best_iteration + 1
+            y_pred = booster.predict(dval, iteration_range=(0, rounds))
+
+        elif model_type == 'lightgbm':
+            train_set, val_set = folds.lgb_data(step)
+            native = {**params, 'objective': 'regression', 'seed': 42, 'verbose': -1}
+            if self.threads:
+                native['num_threads'] = self.threads
+            booster = lgb.train(native, train_set, num_boost_round=n_estimators, valid_sets=[val_set],
+                                callbacks=[lgb.early_stopping(self.early_stopping_rounds, verbose=False)])
+            rounds = booster.best_iteration or booster.current_iteration()
+            y_pred = booster.predict(X_val, num_iteration=rounds)
+
+        else:
+            model = build_model(model_type, {**params, 'n_estimators': n_estimators})
+            if self.threads:
+                model.set_params(n_jobs=self.threads)
+            model.fit(X_train, y_train)
+            rounds = n_estimators
+            y_pred = model.predict(X_val)
+
+        return np.sqrt(mean_squared_error(y_val, y_pred)), rounds
+
+    def optimize(self, X_train: np.ndarray, y_train: np.ndarray, model_type: str) -> Dict[str, Any]:
+        """Best parameters found for ``model_type`` within the trial and time budget."""
+        start = time.perf_counter()
+        budget = self.budget(model_type)
+        folds = CVFolds(X_train, y_train, self.n_splits)
+        if self.n_jobs == 1:
+            study = optuna.create_study(direction='minimize', sampler=self.make_sampler(),
+                                        pruner=self.make_pruner())
+            deadline = None if budget is None else time.time() + budget
+            study.optimize(self.objective(folds, model_type, deadline), n_trials=self.n_trials,
+                           timeout=budget)
+        else:
+            study = self._optimize_parallel(folds, model_type)
+
+        states = [trial.state.name for trial in study.trials]
+        if 'COMPLETE' not in states:
+            raise RuntimeError(f"No {model_type} trial completed within the search budget")
+        logger.info(f"{model_type} search: {states.count('COMPLETE')} complete, {states.count('PRUNED')} pruned "
+                    f"trials in {time.perf_counter() - start:.1f}s, best RMSE {study.best_value:.4f}")
+        best_params = dict(study.best_params)
+        if 'n_estimators' in study.best_trial.user_attrs:
+            # Early stopping found how many rounds the best configuration needs
+            best_params['n_estimators'] = max(1, study.best_trial.user_attrs['n_estimators'])
+        return best_params
+
+    def _optimize_parallel(self, folds: CVFolds, model_type: str):
+        storage_dir = self.storage_dir or Path('.')
+        storage_dir.mkdir(parents=True, exist_ok=True)
+        storage = f"sqlite:///{(storage_dir / 'optuna.db').resolve()}"
+        study_name = f"crop_yield_{model_type}_{uuid.uuid4().hex[:8]}"
+        optuna.create_study(study_name=study_name, storage=storage, direction='minimize')
+
+        budget = self.budget(model_type)
+        deadline = None if budget is None else time.time() + budget
+        # Each worker runs a fixed share of the trials, so the study never overshoots n_trials
+        shares = [self.n_trials // self.n_jobs + (worker < self.n_trials % self.n_jobs)
+                  for worker in range(self.n_jobs)]
+        # Spawned, not forked: the parent may hold SQLite handles and booster thread pools
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.n_jobs, mp_context=context) as pool:
+            futures = [pool.submit(_search_worker, self, study_name, storage, worker, share, deadline, folds,
+                                   model_type)
+                       for worker, share in enumerate(shares) if share]
+            for future in futures:
+                future.result()
+
+        return optuna.load_study(study_name=study_name, storage=storage)
+
+
+def _out_of_time(trial, deadline: Optional[float]) -> bool:
+    if deadline is None or time.time() < deadline:
+        return False
+    completed = trial.study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,))
+    return bool(completed)
+
+
+def _search_worker(search: HyperparameterSearch, study_name: str, storage: str, worker: int, n_trials: int,
+                   deadline: Optional[float], folds: CVFolds, model_type: str) -> int:
+    """Run this worker's ``n_trials`` trials of a shared study in a worker process."""
+    study = optuna.load_study(study_name=study_name, storage=storage,
+                              sampler=search.make_sampler(worker), pruner=search.make_pruner())
+    timeout = None if deadline is None else max(0.0, deadline - time.time())
+    study.optimize(search.objective(folds, model_type, deadline), n_trials=n_trials, timeout=timeout)
+    return len(study.trials)
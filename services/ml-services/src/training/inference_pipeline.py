@@ -0,0 +1,117 @@
+"""
+Compiled Inference Pipeline
+Frozen feature layout and scaling that turn engineered records into model input matrices
+"""
+
+import logging
+from typing import Any, Dict, List, Mapping, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.training.feature_engineering import CATEGORICAL_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+def _frozen(values, dtype) -> np.ndarray:
+    array = np.array(values, dtype=dtype)
+    array.setflags(write=False)
+    return array
+
+
+class CompiledInferencePipeline(NamedTuple):
+    """Training feature layout and scaler parameters frozen into arrays.
+
+    ``numeric_columns`` feed the positions in ``numeric_positions``. Each categorical
+    column maps its values (as strings, the way ``pd.get_dummies`` names them) to
+    the position of their one-hot column; unseen values encode as all zeros.
+    Missing values become 0 before scaling, as ``fillna(0)`` did, and absent columns
+    count as missing. Inputs are the engine's unencoded features (``encode=False``),
+    either a frame or records, so a batch never changes the column set.
+    """
+
+    feature_columns: Tuple[str, ...]
+    numeric_columns: Tuple[str, ...]
+    numeric_positions: np.ndarray
+    categories: Tuple[Tuple[str, Dict[str, int]], ...]
+    mean: np.ndarray
+    scale: np.ndarray
+
+    @classmethod
+    def compile(cls, feature_columns: Sequence[str], scaler,
+                categorical_columns: Sequence[str] = CATEGORICAL_COLUMNS) -> 'CompiledInferencePipeline':
+        """Freeze ``feature_columns`` and a fitted ``StandardScaler`` into a pipeline."""
+        feature_columns = tuple(feature_columns)
+        n_features = len(feature_columns)
+        fitted = getattr(scaler, 'n_features_in_', None)
+        if fitted is not None and fitted != n_features:
+            raise ValueError(f"Scaler was fitted on {fitted} features, feature columns list {n_features}")
+
+        mappings = {column: {} for column in categorical_columns}
+        numeric = []
+        for position, name in enumerate(feature_columns):
+            column = next((column for column in categorical_columns if name.startswith(f'{column}_')), None)
+            if column is None:
+                numeric.append((name, position))
+            else:
+                mappings[column][name[len(column) + 1:]] = position
+
+        mean = getattr(scaler, 'mean_', None)
+        scale = getattr(scaler, 'scale_', None)
+        return cls(
+            feature_columns=feature_columns,
+            numeric_columns=tuple(name for name, _ in numeric),
+            numeric_positions=_frozen([position for _, position in numeric], np.int64),
+            categories=tuple((column, mapping) for column, mapping in mappings.items() if mapping),
+            mean=_frozen(np.zeros(n_features) if mean is None else mean, np.float64),
+            scale=_frozen(np.ones(n_features) if scale is None else scale, np.float64)
+        )
+
+    @property
+    def n_features(self) -> int:
+        return len(self.feature_columns)
+
+    def transform(self, data: Union[pd.DataFrame, Mapping[str, Any], List[Mapping[str, Any]]]) -> np.ndarray:
+        """Scaled, C-contiguous float32 ``(rows, n_features)`` matrix for a frame, record or records."""
+        if isinstance(data, pd.DataFrame):
+            X = self._frame_matrix(data)
+        else:
+            X = self._records_matrix([data] if isinstance(data, Mapping) else data)
+
+        X[np.isnan(X)] = 0
+        X -= self.mean
+        X /= self.scale
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def _frame_matrix(self, df: pd.DataFrame) -> np.ndarray:
+        X = np.zeros((len(df), self.n_features))
+        present = [(name, position) for name, position in zip(self.numeric_columns, self.numeric_positions)
+                   if name in df.columns]
+        if present:
+            names, positions = zip(*present)
+            X[:, list(positions)] = df[list(names)].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        rows = np.arange(len(df))
+        for column, mapping in self.categories:
+            if column not in df.columns:
+                continue
+            values = df[column].to_numpy(dtype=object)
+            codes = pd.Index(list(mapping)).get_indexer(values.astype(str))
+            positions = np.fromiter(mapping.values(), dtype=np.int64, count=len(mapping))
+            hit = codes >= 0
+            X[rows[hit], positions[codes[hit]]] = 1
+        return X
+
+    def _records_matrix(self, records: List[Mapping[str, Any]]) -> np.ndarray:
+        X = np.zeros((len(records), self.n_features))
+        for row, record in zip(X, records):
+            for name, position in zip(self.numeric_columns, self.numeric_positions):
+                value = record.get(name)
+                row[position] = np.nan if value is None else value
+            for column, mapping in self.categories:
+                value = record.get(column)
+                position = None if value is None else mapping.get(str(value))
+                if position is not None:
+                    row[position] = 1
+        return X
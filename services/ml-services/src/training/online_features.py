@@ -0,0 +1,238 @@
+"""
+Online Yield Features
+Incremental per-farm feature state for serving yield predictions one observation at a time
+"""
+
+import logging
+import math
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Hashable, Mapping, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.training.feature_engineering import YieldFeatureEngine
+
+logger = logging.getLogger(__name__)
+
+# Longest trailing window any grouped feature looks at (30-day rainfall)
+HISTORY_ROWS = 30
+NDVI_TREND_PERIODS = 7
+
+
+class RollingWindow:
+    """Fixed-size trailing window with O(1) sum, mean and variance updates.
+
+    Mirrors pandas ``rolling(size, min_periods=size)``: statistics are NaN until the
+    window holds ``size`` non-NaN values. Removals use the same Welford updates as
+    pandas; totals are re-summed from the buffer once per ``size`` pushes so rounding
+    drift stays bounded (amortised O(1)).
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values: deque = deque(maxlen=size)
+        self.pushes = 0
+        self._reset()
+
+    def _reset(self):
+        self.nobs = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+
+    def push(self, value: float):
+        if len(self.values) == self.size:
+            self._remove(self.values[0])
+        self.values.append(value)
+        self._add(value)
+        self.pushes += 1
+        if self.pushes % self.size == 0:
+            self._resync()
+
+    def _add(self, value: float):
+        if math.isnan(value):
+            return
+        self.nobs += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.nobs
+        self.ssqdm += delta * (value - self.mean)
+
+    def _remove(self, value: float):
+        if math.isnan(value):
+            return
+        self.nobs -= 1
+        if self.nobs == 0:
+            self._reset()
+            return
+        self.total -= value
+        delta = value - self.mean
+        self.mean -= delta / self.nobs
+        self.ssqdm -= delta * (value - self.mean)
+
+    def _resync(self):
+        finite = [value for value in self.values if not math.isnan(value)]
+        self._reset()
+        if finite:
+            self.nobs = len(finite)
+            self.total = math.fsum(finite)
+            self.mean = self.total / self.nobs
+            self.ssqdm = math.fsum((value - self.mean) ** 2 for value in finite)
+
+    @property
+    def ready(self) -> bool:
+        return self.nobs >= self.size
+
+    def sum(self) -> float:
+        return self.total if self.ready else np.nan
+
+    def average(self) -> float:
+        return self.total / self.nobs if self.ready else np.nan
+
+    def var(self) -> float:
+        if not self.ready or self.nobs < 2:
+            return np.nan
+        return max(self.ssqdm, 0.0) / (self.nobs - 1)
+
+
+class FarmFeatureState:
+    """Rolling state behind one farm's grouped features (see ``YieldFeatureEngine.grouped_features``)."""
+
+    def __init__(self):
+        self.cumulative_gdd = 0.0
+        self.rainfall_7 = RollingWindow(7)
+        self.rainfall_30 = RollingWindow(30)
+        self.yield_3 = RollingWindow(3)
+        self.yield_lags: deque = deque([np.nan, np.nan], maxlen=2)
+        # Forward-filled NDVI, newest last; the trend compares against 7 rows back
+        self.ndvi_filled: deque = deque(maxlen=NDVI_TREND_PERIODS + 1)
+        self.last_ndvi = np.nan
+        self.observations = 0
+
+    def update(self, gdd: float, rainfall: float, ndvi: float, crop_yield: float) -> Dict[str, float]:
+        """Advance by one observation and return its grouped feature values."""
+        self.observations += 1
+        if math.isnan(gdd):
+            cumulative_gdd = np.nan
+        else:
+            self.cumulative_gdd += gdd
+            cumulative_gdd = self.cumulative_gdd
+
+        self.rainfall_7.push(rainfall)
+        self.rainfall_30.push(rainfall)
+
+        # pct_change forward-fills gaps before comparing
+        if not math.isnan(ndvi):
+            self.last_ndvi = ndvi
+        self.ndvi_filled.append(self.last_ndvi)
+        ndvi_trend = np.nan
+        if len(self.ndvi_filled) > NDVI_TREND_PERIODS:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ndvi_trend = np.float64(self.ndvi_filled[-1]) / np.float64(self.ndvi_filled[0]) - 1
+
+        yield_lag_1, yield_lag_2 = self.yield_lags[-1], self.yield_lags[0]
+        self.yield_lags.append(crop_yield)
+        self.yield_3.push(crop_yield)
+
+        return {
+            'cumulative_gdd': cumulative_gdd,
+            'rainfall_lag_7': self.rainfall_7.sum(),
+            'rainfall_lag_30': self.rainfall_30.sum(),
+            'rainfall_variance': self.rainfall_30.var(),
+            'ndvi_trend': ndvi_trend,
+            'yield_lag_1': yield_lag_1,
+            'yield_lag_2': yield_lag_2,
+            'yield_trend': self.yield_3.average(),
+        }
+
+
+class OnlineFeatureStore:
+    """Per-farm incremental feature state producing ready feature rows for inference.
+
+    Each ``update`` costs O(1) in the farm's history length: running sums and Welford
+    accumulators replace the batch rolling windows, and bounded buffers hold the
+    lags. Observations must arrive in each farm's chronological order, the order
+    ``YieldFeatureEngine`` assumes for its rows. Row-level features (seasons, stress
+    flags, ratios) come from the engine itself, using its training drought threshold.
+    """
+
+    def __init__(self, engine: Optional[YieldFeatureEngine] = None):
+        self.engine = engine or YieldFeatureEngine()
+        self.states: Dict[Hashable, FarmFeatureState] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_lock', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def update(self, record: Mapping[str, Any], encode: bool = True) -> Dict[str, Any]:
+        """Fold one observation into its farm's state and return its feature row.
+
+        ``encode=False`` keeps categorical values unencoded (see ``YieldFeatureEngine.feature_row``).
+        """
+        farm_id = record['farm_id']
+        gdd = float(np.maximum(0, (self._float(record, 'avg_temperature') - self._float(record, 'base_temperature'))))
+        with self._lock:
+            state = self.states.get(farm_id)
+            if state is None:
+                state = self.states[farm_id] = FarmFeatureState()
+            grouped = state.update(gdd, self._float(record, 'rainfall'), self._float(record, 'ndvi'),
+                                   self._float(record, 'yield'))
+        return self.engine.feature_row(dict(record), grouped, encode=encode)
+
+    def bootstrap(self, history: pd.DataFrame) -> int:
+        """Seed farm states from historical observations (per-farm chronological row order).
+
+        Only the trailing rows any window can see are replayed; older rows contribute
+        their GDD total and last NDVI. Returns the number of farms seeded.
+        """
+        keyed = history[history['farm_id'].notna()]
+        seeded = 0
+        for farm_id, rows in keyed.groupby('farm_id', sort=False):
+            state = FarmFeatureState()
+            older, recent = rows.iloc[:-HISTORY_ROWS], rows.iloc[-HISTORY_ROWS:]
+            if len(older):
+                # Every window is refilled by the replay; only running totals and the NDVI fill carry over
+                gdd = np.maximum(0, (older['avg_temperature'] - older['base_temperature']))
+                state.cumulative_gdd = float(gdd.sum())
+                last_ndvi = older['ndvi'].dropna()
+                state.last_ndvi = float(last_ndvi.iloc[-1]) if len(last_ndvi) else np.nan
+                state.observations = len(older)
+
+            gdd = np.maximum(0, (recent['avg_temperature'] - recent['base_temperature'])).to_numpy(dtype=np.float64)
+            columns = zip(gdd, recent['rainfall'].to_numpy(dtype=np.float64),
+                          recent['ndvi'].to_numpy(dtype=np.float64), recent['yield'].to_numpy(dtype=np.float64))
+            for values in columns:
+                state.update(*values)
+
+            with self._lock:
+                self.states[farm_id] = state
+            seeded += 1
+
+        logger.info(f"Seeded online feature state for {seeded} farms")
+        return seeded
+
+    def save(self, path: Path):
+        with self._lock:
+            joblib.dump(self, path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'OnlineFeatureStore':
+        return joblib.load(path)
+
+    @staticmethod
+    def _float(record: Mapping[str, Any], key: str) -> float:
+        value = record.get(key)
+        return np.nan if value is None or pd.isna(value) else float(value)
@@ -0,0 +1,114 @@
+"""
+Training Orchestrator
+Concurrent, core-budgeted training of independent model families
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Union
+
+import joblib
+
+from src.lazy_imports import lazy_import
+
+keras = lazy_import('tensorflow', 'keras')
+
+logger = logging.getLogger(__name__)
+
+MODEL_FAMILIES = ('xgboost', 'lightgbm', 'random_forest', 'neural_network')
+
+
+class TrainingOrchestrator:
+    """Runs one training job per model family and gathers metrics and artifacts.
+
+    ``trainer(family, X_train, y_train, X_test, y_test, threads, artifact_dir)`` must
+    pickle (a module-level function or a partial of one). It trains and evaluates one family, saves the model
+    under ``artifact_dir`` and returns its metrics with the artifact path. With
+    ``workers > 1`` each job runs in a fresh spawned process, so thread pools and
+    TensorFlow initialise per job and only use that job's ``threads``. ``threads``
+    is a number or a per-family mapping, and defaults to an even split of the cores
+    across workers. ``workers=1`` runs the jobs in order in this process. Results
+    keep ``families`` order, so the ensemble built from them does not depend on
+    completion order.
+    """
+
+    def __init__(self, trainer: Callable[..., Dict[str, Any]], artifact_dir: Path,
+                 families: Sequence[str] = MODEL_FAMILIES, workers: Optional[int] = None,
+                 threads: Union[None, int, Dict[str, int]] = None):
+        unknown = set(families) - set(MODEL_FAMILIES)
+        if unknown:
+            raise ValueError(f"Unknown model families: {sorted(unknown)}")
+        self.trainer = trainer
+        self.artifact_dir = Path(artifact_dir)
+        self.families = list(families)
+        self.workers = max(1, min(workers or os.cpu_count() or 1, len(self.families)))
+        self.threads = threads
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], trainer: Callable[..., Dict[str, Any]],
+                    artifact_dir: Path) -> 'TrainingOrchestrator':
+        """Build an orchestrator from a ``training`` config section."""
+        return cls(
+            trainer=trainer,
+            artifact_dir=config.get('artifact_dir', artifact_dir),
+            families=config.get('families', MODEL_FAMILIES),
+            workers=config.get('workers'),
+            threads=config.get('threads')
+        )
+
+    def threads_for(self, family: str) -> int:
+        if isinstance(self.threads, dict) and family in self.threads:
+            return int(self.threads[family])
+        if isinstance(self.threads, int):
+            return self.threads
+        return max(1, (os.cpu_count() or 1) // self.workers)
+
+    def run(self, X_train, y_train, X_test, y_test) -> Dict[str, Dict[str, Any]]:
+        """Train every family and return its results with the trained model loaded."""
+        self.artifact_dir.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+
+        if self.workers == 1:
+            results = {family: self.trainer(family, X_train, y_train, X_test, y_test,
+                                            self.threads_for(family), self.artifact_dir)
+                       for family in self.families}
+        else:
+            results = self._run_pool(X_train, y_train, X_test, y_test)
+
+        for family, result in results.items():
+            result['model'] = load_artifact(family, result['artifact'])
+        logger.info(f"Trained {len(results)} model families with {self.workers} workers "
+                    f"in {time.perf_counter() - start:.1f}s")
+        return {family: results[family] for family in self.families}
+
+    def _run_pool(self, X_train, y_train, X_test, y_test) -> Dict[str, Dict[str, Any]]:
+        context = multiprocessing.get_context('spawn')
+        results = {}
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context, max_tasks_per_child=1) as pool:
+            futures = {
+                pool.submit(self.trainer, family, X_train, y_train, X_test, y_test,
+                            self.threads_for(family), self.artifact_dir): family
+                for family in self.families
+            }
+            try:
+                for future in as_completed(futures):
+                    family = futures[future]
+                    results[family] = future.result()
+                    logger.info(f"{family} finished in {results[family]['seconds']:.1f}s "
+                                f"(RMSE {results[family]['rmse']:.4f})")
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+        return results
+
+
+def load_artifact(family: str, path: Union[str, Path]):
+    """Load a model saved by a training job."""
+    if family == 'neural_network':
+        return keras.models.load_model(path)
+    return joblib.load(path)
@@ -0,0 +1,99 @@
+"""
+Shared Test Fixtures
+Synthetic scenes, boundaries and yield histories for the processing and training tests
+"""
+
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+SERVICE_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVICE_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVICE_ROOT))
+
+SCENE_ORIGIN = (500000.0, 2000000.0)
+PIXEL_SIZE = 10.0
+
+
+def write_scene(path: Path, size: int = 256, bands: int = 6, block_size: int = 64, seed: int = 0,
+                nodata: Optional[int] = None, nodata_fraction: float = 0.0) -> Path:
+    """Write a tiled uint16 GeoTIFF in EPSG:32643; ``nodata_fraction`` of its pixels are nodata in one band."""
+    rng = np.random.default_rng(seed)
+    data = rng.integers(1, 10000, size=(bands, size, size)).astype(np.uint16)
+    if nodata is not None and nodata_fraction:
+        holes = rng.random((size, size)) < nodata_fraction
+        data[rng.integers(bands), holes] = nodata
+
+    with rasterio.open(
+        path, 'w', driver='GTiff', height=size, width=size, count=bands, dtype='uint16',
+        crs='EPSG:32643', transform=from_origin(*SCENE_ORIGIN, PIXEL_SIZE, PIXEL_SIZE),
+        tiled=True, blockxsize=block_size, blockysize=block_size, nodata=nodata
+    ) as dst:
+        dst.write(data)
+    return path
+
+
+def farm_boundary(col: float, row: float, width: float, height: float) -> Dict[str, Any]:
+    """Quadrilateral boundary (GeoJSON, scene CRS) spanning the given pixel extent."""
+    x0 = SCENE_ORIGIN[0] + col * PIXEL_SIZE
+    y0 = SCENE_ORIGIN[1] - row * PIXEL_SIZE
+    x1 = x0 + width * PIXEL_SIZE
+    y1 = y0 - height * PIXEL_SIZE
+    return {
+        'type': 'Polygon',
+        'coordinates': [[(x0, y0), (x1, y0), (x1 - 0.3 * (x1 - x0), y1), (x0, y1 + 0.2 * (y0 - y1)), (x0, y0)]]
+    }
+
+
+def yield_history(farms: int = 3, rows: int = 45, seed: int = 0) -> pd.DataFrame:
+    """Per-farm chronological yield observations with every column the feature engine reads."""
+    rng = np.random.default_rng(seed)
+    n = farms * rows
+    data = pd.DataFrame({
+        'farm_id': np.repeat([f'farm-{farm}' for farm in range(farms)], rows),
+        'planting_date': np.tile(pd.date_range('2023-01-01', periods=rows, freq='7D').astype(str), farms),
+        'avg_temperature': rng.normal(26, 4, n),
+        'base_temperature': np.full(n, 10.0),
+        'max_temperature': rng.normal(33, 4, n),
+        'min_temperature': rng.normal(14, 4, n),
+        'humidity': rng.uniform(20, 95, n),
+        'rainfall': rng.gamma(2.0, 5.0, n),
+        'ndvi': rng.uniform(0.2, 0.9, n),
+        'evi': rng.uniform(0.1, 0.7, n),
+        'savi': rng.uniform(0.1, 0.7, n),
+        'soil_organic_carbon': rng.uniform(0.5, 2.0, n),
+        'soil_ph': rng.uniform(5.5, 8.0, n),
+        'soil_nitrogen': rng.uniform(100, 300, n),
+        'soil_phosphorus': rng.uniform(10, 40, n),
+        'soil_potassium': rng.uniform(100, 300, n),
+        'fertilizer_nitrogen': rng.uniform(50, 150, n),
+        'fertilizer_phosphorus': rng.uniform(20, 60, n),
+        'fertilizer_potassium': rng.uniform(20, 60, n),
+        'irrigation_amount': rng.uniform(0, 50, n),
+        'market_price': rng.uniform(1500, 2500, n),
+        'total_cost': rng.uniform(10000, 20000, n),
+        'crop_variety': rng.choice(['hd2967', 'pbw343'], n),
+        'soil_type': rng.choice(['loam', 'clay'], n),
+        'irrigation_method': rng.choice(['drip', 'flood'], n),
+    })
+    data['yield'] = 2.0 + 0.02 * data['rainfall'] + 3.0 * data['ndvi'] + rng.normal(0, 0.2, n)
+    # Gaps exercise the NaN handling of the rolling windows
+    data.loc[[4, rows + 10], 'rainfall'] = np.nan
+    data.loc[[rows + 20], 'yield'] = np.nan
+    return data
+
+
+@pytest.fixture
+def processor_config(tmp_path):
+    """Processor config keeping every on-disk artefact under the test's temporary directory."""
+    return {
+        'catalog': {'path': str(tmp_path / 'scene_catalog.sqlite')},
+        'output': {'cog_dir': str(tmp_path / 'rasters')},
+        'executor': {'cpu_backend': 'thread', 'cpu_workers': 1, 'io_workers': 2},
+    }
@@ -0,0 +1,73 @@
+"""
+Crop Yield Training Tests
+Per-family training jobs and the online feature state behind single-record predictions
+"""
+
+import numpy as np
+import pytest
+
+from conftest import yield_history
+from src.training.crop_yield_model import train_model_family
+from src.training.feature_engineering import YieldFeatureEngine
+from src.training.hyperparameter_search import HyperparameterSearch
+from src.training.online_features import OnlineFeatureStore
+
+
+class RecordingSearch(HyperparameterSearch):
+    """Skips tuning and records the worker and thread split each search ran with."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Shared with the per-job copies made by train_model_family
+        self.splits = []
+
+    def optimize(self, X_train, y_train, model_type):
+        self.splits.append((self.n_jobs, self.threads))
+        return {'n_estimators': 5}
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(80, 4))
+    y = X @ np.array([1.0, -2.0, 0.5, 0.0]) + rng.normal(0, 0.1, size=80)
+    return X[:60], y[:60], X[60:], y[60:]
+
+
+@pytest.mark.parametrize('n_jobs, threads, expected', [
+    (1, 4, (1, 4)),
+    (2, 4, (2, 2)),
+    (3, 4, (3, 1)),
+    (8, 4, (4, 1)),
+])
+def test_search_workers_share_the_job_thread_budget(tmp_path, data, n_jobs, threads, expected):
+    search = RecordingSearch(n_jobs=n_jobs)
+
+    result = train_model_family('random_forest', *data, threads=threads, artifact_dir=tmp_path, search=search)
+
+    assert search.splits == [expected]
+    assert expected[0] * expected[1] <= threads
+    # The caller's search is left as configured
+    assert search.n_jobs == n_jobs
+    assert result['threads'] == threads
+    assert (tmp_path / 'random_forest_model.pkl').exists()
+
+
+def test_online_features_match_batch_features_row_by_row():
+    # Farms' observations interleave by date, as they arrive online
+    history = yield_history(farms=2, rows=45).sort_values('planting_date', kind='stable').reset_index(drop=True)
+    engine = YieldFeatureEngine()
+    batch = engine.grouped_features(history)
+    store = OnlineFeatureStore(engine)
+
+    rows = [store.update(record, encode=False) for record in history.to_dict('records')]
+
+    for name, expected in batch.items():
+        online = np.array([row[name] for row in rows], dtype=np.float64)
+        np.testing.assert_allclose(online, expected, rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=name)
+    # Every window is full by each farm's last row
+    last = rows[-1]
+    for name in ('rainfall_lag_7', 'rainfall_lag_30', 'rainfall_variance', 'yield_trend', 'ndvi_trend'):
+        assert np.isfinite(last[name]), name
+    farm_yields = history.loc[history['farm_id'] == history['farm_id'].iloc[-1], 'yield']
+    assert (last['yield_lag_1'], last['yield_lag_2']) == tuple(farm_yields.iloc[-2:-4:-1])
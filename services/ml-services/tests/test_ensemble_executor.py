@@ -0,0 +1,102 @@
+"""
+Ensemble Executor Tests
+Concurrent member evaluation, weight filtering and timeouts against the serial weighted sum
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from src.training.ensemble_executor import EnsembleExecutor
+
+
+class LinearMember:
+    """Predicts ``X @ coefficients``; optionally blocks its first ``hangs`` calls on ``release``."""
+
+    def __init__(self, coefficients, release: threading.Event = None, hangs: int = 0):
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.release = release
+        self.hangs = hangs
+
+    def predict(self, X):
+        if self.hangs:
+            self.hangs -= 1
+            self.release.wait(10)
+        return X @ self.coefficients
+
+
+class FailingMember:
+    def predict(self, X):
+        raise AssertionError("member below min_weight was evaluated")
+
+
+@pytest.fixture
+def X():
+    return np.random.default_rng(0).normal(size=(50, 3))
+
+
+@pytest.fixture
+def executor():
+    executor = EnsembleExecutor(member_timeout=0.5)
+    yield executor
+    executor.shutdown(wait=False)
+
+
+def serial(models, weights, X):
+    return sum(weight * models[name].predict(X) for name, weight in weights.items())
+
+
+def test_concurrent_prediction_equals_serial_weighted_sum(executor, X):
+    models = {name: LinearMember(coefficients) for name, coefficients in
+              (('xgboost', [1, 0, 2]), ('lightgbm', [0.5, 1, 0]), ('random_forest', [0, -1, 1]))}
+    weights = {'xgboost': 0.5, 'lightgbm': 0.3, 'random_forest': 0.2, 'not_loaded': 0.4}
+
+    expected = serial(models, {name: weights[name] for name in models}, X)
+
+    np.testing.assert_allclose(executor.predict(models, weights, X), expected)
+    assert {name: stats['calls'] for name, stats in executor.metrics().items()} == dict.fromkeys(models, 1)
+
+
+def test_members_below_min_weight_are_skipped_and_weights_rescaled(X):
+    models = {'xgboost': LinearMember([1, 0, 2]), 'lightgbm': LinearMember([0.5, 1, 0]),
+              'random_forest': FailingMember()}
+    weights = {'xgboost': 0.6, 'lightgbm': 0.35, 'random_forest': 0.05}
+    executor = EnsembleExecutor(min_weight=0.1)
+    try:
+        result = executor.predict(models, weights, X)
+    finally:
+        executor.shutdown()
+
+    kept = {'xgboost': 0.6, 'lightgbm': 0.35}
+    assert executor.members(models, weights) == list(kept.items())
+    np.testing.assert_allclose(result, serial(models, kept, X) / 0.95)
+
+
+def test_late_member_is_dropped_and_remaining_weights_rescaled(executor, X):
+    release = threading.Event()
+    models = {'xgboost': LinearMember([1, 0, 2]), 'lightgbm': LinearMember([0.5, 1, 0], release, hangs=1)}
+    weights = {'xgboost': 0.75, 'lightgbm': 0.25}
+    try:
+        result = executor.predict(models, weights, X)
+    finally:
+        release.set()
+
+    np.testing.assert_allclose(result, models['xgboost'].predict(X))
+    assert executor.metrics()['lightgbm']['timeouts'] == 1
+
+
+def test_hung_members_do_not_starve_later_calls(executor, X):
+    release = threading.Event()
+    models = {'xgboost': LinearMember([1, 0, 2], release, hangs=1),
+              'lightgbm': LinearMember([0.5, 1, 0], release, hangs=1)}
+    weights = {'xgboost': 0.5, 'lightgbm': 0.5}
+    try:
+        with pytest.raises(TimeoutError):
+            executor.predict(models, weights, X)
+        # Both members still hold their original threads
+        result = executor.predict(models, weights, X)
+    finally:
+        release.set()
+
+    np.testing.assert_allclose(result, serial(models, weights, X))
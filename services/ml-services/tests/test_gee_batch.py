@@ -0,0 +1,157 @@
+"""
+Earth Engine Batch Tests
+Chunking and per-farm result mapping of batched reduceRegions requests against a stub ee module
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from conftest import farm_boundary
+from src.processors.gee_batch import CLOUD_BAND, DEFAULT_BANDS, TIME_BAND, GeeBatchClient, chunk_farms
+from src.processors.satellite_processor import SatelliteDataProcessor
+
+
+class Chained:
+    """Server-side object whose methods only build up a request."""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+
+class StubFeatureCollection(Chained):
+    def __init__(self, features: List[Dict[str, Any]]):
+        self.features = features
+
+
+class StubMosaic(Chained):
+    def __init__(self, ee: 'StubEE'):
+        self.ee = ee
+
+    def reduceRegions(self, collection: StubFeatureCollection, **kwargs):
+        self.ee.requests.append(collection.features)
+        return StubResult(self.ee, collection.features)
+
+
+class StubResult:
+    def __init__(self, ee: 'StubEE', features: List[Dict[str, Any]]):
+        self.ee = ee
+        self.features = features
+
+    def getInfo(self) -> Dict[str, Any]:
+        if self.ee.fail:
+            raise RuntimeError('quota exceeded')
+        # Earth Engine does not promise feature order; answer in reverse
+        return {'features': [
+            {'type': 'Feature', 'properties': {**feature['properties'], **self.ee.reduce(feature['geometry'])}}
+            for feature in reversed(self.features)
+        ]}
+
+
+class StubEE:
+    """Just enough of the ``ee`` API for ``GeeBatchClient``, reducing each boundary to known values."""
+
+    def __init__(self, cloudy_x: Optional[float] = None, fail: bool = False):
+        self.requests: List[List[Dict[str, Any]]] = []
+        self.cloudy_x = cloudy_x
+        self.fail = fail
+        self.Reducer = Chained()
+        self.Filter = Chained()
+
+    def Geometry(self, boundary):
+        return boundary
+
+    def Feature(self, geometry, properties):
+        return {'geometry': geometry, 'properties': properties}
+
+    def FeatureCollection(self, features):
+        return StubFeatureCollection(features)
+
+    def ImageCollection(self, name):
+        collection = Chained()
+        collection.mosaic = lambda: StubMosaic(self)
+        return collection
+
+    def reduce(self, boundary: Dict[str, Any]) -> Dict[str, Any]:
+        x = boundary['coordinates'][0][0][0]
+        if x == self.cloudy_x:
+            # Every pixel masked by the cloud filter: the reducers emit nothing
+            return {}
+        properties = {f'{TIME_BAND}_max': int(x), f'{CLOUD_BAND}_max': 5.0}
+        for position, band in enumerate(DEFAULT_BANDS):
+            properties.update({f'{band}_mean': x + position, f'{band}_stdDev': 0.5,
+                               f'{band}_min': x + position - 1, f'{band}_max': x + position + 1})
+        return properties
+
+
+def make_farms(n_farms: int) -> Dict[str, Dict[str, Any]]:
+    return {f'farm-{position}': farm_boundary(10 * position, 0, 5, 5) for position in range(n_farms)}
+
+
+def farm_x(boundary: Dict[str, Any]) -> float:
+    return boundary['coordinates'][0][0][0]
+
+
+def test_chunk_farms_bounds_features_and_vertices():
+    farms = list(make_farms(7).items())
+
+    assert [len(batch) for batch in chunk_farms(farms, max_features=3)] == [3, 3, 1]
+    # Each boundary ring has 5 vertices
+    assert [len(batch) for batch in chunk_farms(farms, max_features=10, max_vertices=12)] == [2, 2, 2, 1]
+    assert [farm_id for batch in chunk_farms(farms, max_features=3) for farm_id, _ in batch] == \
+        [farm_id for farm_id, _ in farms]
+
+
+def test_fetch_sends_one_reduce_regions_per_batch_and_maps_every_farm():
+    farms = make_farms(7)
+    ee = StubEE(cloudy_x=farm_x(farms['farm-4']))
+    client = GeeBatchClient(ee_module=ee, max_features=3)
+
+    results = {}
+    for batch in client.batches(farms):
+        results.update(client.fetch(batch, '2024-01-01', '2024-02-01'))
+
+    assert [len(features) for features in ee.requests] == [3, 3, 1]
+    assert [feature['properties']['farm_index'] for features in ee.requests for feature in features] == \
+        [0, 1, 2, 0, 1, 2, 0]
+    assert set(results) == set(farms)
+
+    assert results['farm-4'] == {'status': 'no_data'}
+    for farm_id, boundary in farms.items():
+        if farm_id == 'farm-4':
+            continue
+        x = farm_x(boundary)
+        result = results[farm_id]
+        assert result['status'] == 'completed'
+        assert result['statistics']['NDVI'] == x + DEFAULT_BANDS.index('NDVI')
+        assert result['statistics_detail']['B8'] == {'mean': x + 3, 'std': 0.5, 'min': x + 2, 'max': x + 4}
+        assert result['image_date'] == int(x)
+
+
+def test_fetch_reports_a_failed_batch_for_each_of_its_farms():
+    farms = make_farms(4)
+    client = GeeBatchClient(ee_module=StubEE(fail=True), max_features=3)
+
+    batch = client.batches(farms)[0]
+    results = client.fetch(batch, '2024-01-01', '2024-02-01')
+
+    assert list(results) == ['farm-0', 'farm-1', 'farm-2']
+    assert all(result == {'status': 'error', 'message': 'quota exceeded'} for result in results.values())
+
+
+def test_process_gee_batch_merges_concurrent_batches(processor_config):
+    farms = make_farms(5)
+    ee = StubEE()
+    processor = SatelliteDataProcessor(processor_config)
+    processor.gee_initialized = True
+    processor.gee_batch = GeeBatchClient.from_config({'batch_size': 2}, ee_module=ee)
+    try:
+        results = asyncio.run(processor.process_gee_batch(farms, '2024-01-01', '2024-02-01'))
+    finally:
+        processor.shutdown()
+
+    assert len(ee.requests) == 3
+    assert list(results) == list(farms)
+    for farm_id, boundary in farms.items():
+        assert results[farm_id]['statistics']['B2'] == pytest.approx(farm_x(boundary))
@@ -0,0 +1,142 @@
+"""
+Hyperparameter Search Tests
+Per-fold pruning, time budgets, seeded reproducibility, exact trial counts across workers,
+shared native fold data and early stopping
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from src.training.hyperparameter_search import CVFolds, HyperparameterSearch
+
+optuna = pytest.importorskip('optuna')
+pytest.importorskip('xgboost')
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(240, 5))
+    y = X @ np.array([2.0, -1.0, 0.5, 0.0, 0.0]) + rng.normal(0, 0.1, size=240)
+    return X, y
+
+
+def fold_stub(rmse: float, calls: list, seconds: float = 0.0):
+    """``fit_fold`` replacement returning a fixed RMSE and recording each fitted fold."""
+    def fit_fold(folds, step, model_type, params):
+        calls.append(step)
+        time.sleep(seconds)
+        return rmse, params['n_estimators']
+    return fit_fold
+
+
+def test_weak_trial_is_pruned_after_the_warmup_fold(data):
+    search = HyperparameterSearch(n_splits=4, seed=0)
+    study = optuna.create_study(direction='minimize', pruner=search.make_pruner())
+    distributions = {'n_estimators': optuna.distributions.IntDistribution(100, 1000)}
+    for _ in range(5):
+        study.add_trial(optuna.trial.create_trial(
+            params={'n_estimators': 100}, distributions=distributions, value=0.1,
+            intermediate_values={step: 0.1 for step in range(4)}
+        ))
+    calls = []
+    search.fit_fold = fold_stub(10.0, calls)
+
+    study.optimize(search.objective(CVFolds(*data, 4), 'xgboost'), n_trials=1)
+
+    assert study.trials[-1].state == optuna.trial.TrialState.PRUNED
+    # Fold 0 is the warmup step; the trial stops after reporting fold 1
+    assert calls == [0, 1]
+
+
+def test_search_stops_at_the_time_budget(data):
+    search = HyperparameterSearch(n_trials=1000, n_splits=3, seed=0, pruner='none', time_budget=0.3)
+    calls = []
+    search.fit_fold = fold_stub(1.0, calls, seconds=0.05)
+
+    start = time.perf_counter()
+    params = search.optimize(*data, 'random_forest')
+    elapsed = time.perf_counter() - start
+
+    # One completed trial is kept; later trials stop at their next fold past the deadline
+    assert params['n_estimators'] >= 100
+    assert len(calls) < 30
+    assert elapsed < 0.3 + 3 * 0.05 + 1.0
+
+
+def test_serial_seeded_search_is_reproducible(data):
+    results = [HyperparameterSearch(n_trials=6, n_splits=3, seed=7, early_stopping_rounds=10).optimize(*data, 'xgboost')
+               for _ in range(2)]
+
+    assert results[0] == results[1]
+
+
+def test_parallel_workers_run_exactly_n_trials(tmp_path, data):
+    search = HyperparameterSearch(n_trials=5, n_splits=2, n_jobs=2, seed=0, pruner='none',
+                                  storage_dir=tmp_path, early_stopping_rounds=5)
+
+    params = search.optimize(*data, 'xgboost')
+
+    storage = f"sqlite:///{tmp_path / 'optuna.db'}"
+    (study_name,) = optuna.study.get_all_study_names(storage)
+    trials = optuna.load_study(study_name=study_name, storage=storage).trials
+    assert len(trials) == 5
+    assert all(trial.state == optuna.trial.TrialState.COMPLETE for trial in trials)
+    assert params['n_estimators'] >= 1
+
+
+@pytest.fixture
+def separable():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(400, 4))
+    y = np.where(X[:, 0] > 0, 5.0, -5.0) + rng.normal(0, 0.5, size=400)
+    return X, y
+
+
+@pytest.mark.parametrize('model_type, module, constructor', [
+    ('xgboost', 'xgboost', 'QuantileDMatrix'),
+    ('lightgbm', 'lightgbm', 'Dataset'),
+])
+def test_native_fold_data_is_built_once_and_shared_by_trials(monkeypatch, separable, model_type, module, constructor):
+    library = pytest.importorskip(module)
+    built = []
+    original = getattr(library, constructor)
+
+    def counting(*args, **kwargs):
+        built.append(args)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(library, constructor, counting)
+    search = HyperparameterSearch(n_trials=4, n_splits=3, seed=0, pruner='none', early_stopping_rounds=5)
+    folds = CVFolds(*separable, 3)
+    native = getattr(folds, 'xgb_data' if model_type == 'xgboost' else 'lgb_data')
+    seen = []
+    fit_fold = search.fit_fold
+
+    def recording(folds, step, model_type, params):
+        seen.append(native(step))
+        return fit_fold(folds, step, model_type, params)
+    search.fit_fold = recording
+
+    study = optuna.create_study(direction='minimize', sampler=search.make_sampler())
+    study.optimize(search.objective(folds, model_type), n_trials=4)
+
+    # One training and one validation set per fold, however many trials ran
+    assert len(built) == 2 * len(folds)
+    assert len(seen) == 4 * len(folds)
+    for step in range(len(folds)):
+        assert all(pair is seen[step] for pair in seen[step::len(folds)])
+
+
+@pytest.mark.parametrize('model_type', ['xgboost', 'lightgbm'])
+def test_early_stopping_ends_before_n_estimators(separable, model_type):
+    pytest.importorskip(model_type)
+    search = HyperparameterSearch(n_splits=3, early_stopping_rounds=10)
+    folds = CVFolds(*separable, 3)
+    params = {'n_estimators': 1000, 'max_depth': 3, 'learning_rate': 0.3}
+
+    for step in range(len(folds)):
+        rmse, rounds = search.fit_fold(folds, step, model_type, params)
+        assert rounds < 1000 - search.early_stopping_rounds
+        assert rmse < 0.25 * folds.y.std()
@@ -0,0 +1,63 @@
+"""
+Import-Time Budget Tests
+Pipeline modules must import quickly and leave optional backends unloaded
+"""
+
+import json
+import os
+import subprocess
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+SERVICE_ROOT = Path(__file__).resolve().parents[1]
+
+# Cold-import budget per module, generous enough for shared CI runners
+IMPORT_BUDGET_SECONDS = float(os.environ.get('IMPORT_BUDGET_SECONDS', '5'))
+
+# Backends that load on first use only (boto3 is left out: rasterio imports it when present)
+DEFERRED_MODULES = {
+    'src.processors.satellite_processor': [
+        'tensorflow', 'cv2', 'ee', 'google.cloud.storage', 'geopandas', 'aiofiles', 'sklearn',
+    ],
+    'src.training.crop_yield_model': [
+        'tensorflow', 'xgboost', 'lightgbm', 'optuna', 'mlflow',
+    ],
+}
+
+IMPORT_PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "print(json.dumps({{'seconds': time.perf_counter() - start, 'modules': sorted(sys.modules)}}))\n"
+)
+
+
+@lru_cache(maxsize=None)
+def cold_import(module: str) -> Dict[str, Any]:
+    """Import a module in a fresh interpreter and report its import time and loaded modules."""
+    result = subprocess.run(
+        [sys.executable, '-c', IMPORT_PROBE.format(module=module)],
+        cwd=SERVICE_ROOT, capture_output=True, text=True, timeout=300
+    )
+    if result.returncode != 0:
+        pytest.fail(f"Importing {module} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize('module', sorted(DEFERRED_MODULES))
+def test_optional_backends_are_not_imported(module):
+    loaded = set(cold_import(module)['modules'])
+    eager = [name for name in DEFERRED_MODULES[module] if name in loaded]
+    assert not eager, f"{module} imports {eager} at import time"
+
+
+@pytest.mark.parametrize('module', sorted(DEFERRED_MODULES))
+def test_import_time_within_budget(module):
+    seconds = cold_import(module)['seconds']
+    assert seconds < IMPORT_BUDGET_SECONDS, (
+        f"Importing {module} took {seconds:.2f}s (budget {IMPORT_BUDGET_SECONDS:.2f}s)"
+    )
@@ -0,0 +1,71 @@
+"""
+Compiled Inference Pipeline Tests
+Frozen feature layout and scaling agree with one-hot encoding plus StandardScaler
+"""
+
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import StandardScaler
+
+from conftest import yield_history
+from src.training.feature_engineering import YieldFeatureEngine
+from src.training.inference_pipeline import CompiledInferencePipeline
+
+# planting_season is a label the scaler path cannot take
+EXCLUDED = ['yield', 'farm_id', 'planting_date', 'planting_season']
+
+
+@pytest.fixture(scope='module')
+def trained():
+    engine = YieldFeatureEngine()
+    df = engine.transform(yield_history(seed=0), fit=True)
+    feature_columns = [column for column in df.columns if column not in EXCLUDED]
+    X = df[feature_columns].fillna(0)
+    scaler = StandardScaler().fit(X)
+    model = Ridge().fit(scaler.transform(X), df['yield'].fillna(0))
+    return engine, feature_columns, scaler, model
+
+
+def test_compiled_pipeline_matches_dummies_and_scaler(trained):
+    engine, feature_columns, scaler, model = trained
+    data = yield_history(seed=1)
+    # A variety never seen in training encodes as all zeros
+    data.loc[::5, 'crop_variety'] = 'unseen'
+    # Columns absent at inference count as missing
+    missing = ['soil_ph', 'irrigation_method']
+
+    encoded = engine.transform(data)
+    encoded = encoded.drop(columns=[column for column in encoded.columns
+                                    if column == 'soil_ph' or column.startswith('irrigation_method_')])
+    X_reference = scaler.transform(encoded.reindex(columns=feature_columns).fillna(0))
+    expected = model.predict(X_reference)
+
+    pipeline = CompiledInferencePipeline.compile(feature_columns, scaler)
+    unencoded = engine.transform(data, encode=False).drop(columns=missing)
+    X_frame = pipeline.transform(unencoded)
+    X_records = pipeline.transform(unencoded.to_dict('records'))
+
+    assert X_frame.dtype == np.float32 and X_frame.flags['C_CONTIGUOUS']
+    np.testing.assert_allclose(X_frame, X_reference, rtol=1e-5, atol=1e-5)
+    np.testing.assert_array_equal(X_records, X_frame)
+    np.testing.assert_allclose(model.predict(X_frame), expected, rtol=1e-4, atol=1e-4)
+
+
+def test_compiled_arrays_are_frozen(trained):
+    _, feature_columns, scaler, _ = trained
+    pipeline = CompiledInferencePipeline.compile(feature_columns, scaler)
+
+    for array in (pipeline.mean, pipeline.scale, pipeline.numeric_positions):
+        with pytest.raises(ValueError):
+            array[0] = 1
+    # Transforms never write through to the frozen parameters
+    pipeline.transform({'gdd': 5.0})
+    np.testing.assert_array_equal(pipeline.mean, scaler.mean_)
+
+
+def test_compile_rejects_a_scaler_fitted_on_other_columns(trained):
+    _, feature_columns, scaler, _ = trained
+
+    with pytest.raises(ValueError):
+        CompiledInferencePipeline.compile(feature_columns[:-1], scaler)
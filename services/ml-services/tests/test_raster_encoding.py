@@ -0,0 +1,35 @@
+"""
+Raster Encoding Tests
+Accept header negotiation honours q-values, wildcards and explicit requests
+"""
+
+import pytest
+
+from src.processors.raster_encoding import negotiate_raster_format
+
+
+@pytest.mark.parametrize('accept, expected', [
+    ('application/json;q=0, image/tiff', 'cog'),
+    ('application/json;q=0.5, image/png;q=0.9', 'png'),
+    ('image/png;q=0.8, application/x-npy;q=0.8', 'png'),
+    ('application/x-npy, image/png', 'npy'),
+    ('Image/PNG; Q=1', 'png'),
+    ('image/tiff; application=geotiff; profile=cloud-optimized', 'cog'),
+    ('image/tiff; profile=other', 'rle'),
+    ('image/*, image/png;q=0', 'cog'),
+    ('*/*', 'rle'),
+    ('*/*;q=0.1, application/json', 'list'),
+    ('text/html, application/json;q=bogus', 'rle'),
+    ('application/json;q=0', 'rle'),
+    ('', 'rle'),
+    (None, 'rle'),
+])
+def test_accept_header_negotiation(accept, expected):
+    assert negotiate_raster_format(accept) == expected
+
+
+def test_explicit_request_wins_and_is_validated():
+    assert negotiate_raster_format('image/png', requested='npy') == 'npy'
+    assert negotiate_raster_format('*/*', default='png') == 'png'
+    with pytest.raises(ValueError):
+        negotiate_raster_format(requested='gif')
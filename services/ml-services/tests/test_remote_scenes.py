@@ -0,0 +1,183 @@
+"""
+Remote Scene Tests
+Windowed range reads from an S3-compatible stand-in and the on-disk block cache
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.mask import mask
+from rasterio.windows import Window
+from shapely.geometry import shape
+
+from conftest import farm_boundary, write_scene
+from src.processors.remote_scenes import BlockDiskCache, RemoteSceneReader, is_remote, vsi_path
+from src.processors.satellite_processor import SatelliteDataProcessor
+from src.processors.scene_cache import SceneCache
+
+BUCKET = 'scenes'
+
+
+@pytest.fixture(scope='module')
+def s3_endpoint():
+    """moto's S3 server on a free local port, reachable from both boto3 and GDAL."""
+    server_module = pytest.importorskip('moto.server')
+    server = server_module.ThreadedMotoServer(ip_address='127.0.0.1', port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f'http://{host}:{port}'
+    server.stop()
+
+
+@pytest.fixture
+def s3_client(s3_endpoint, monkeypatch):
+    boto3 = pytest.importorskip('boto3')
+    # GDAL and boto3 both read these; moto accepts any credentials
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    monkeypatch.setenv('AWS_REGION', 'us-east-1')
+    client = boto3.client('s3', endpoint_url=s3_endpoint, region_name='us-east-1')
+    try:
+        client.create_bucket(Bucket=BUCKET)
+    except client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+    return client
+
+
+@pytest.fixture
+def reader(tmp_path, s3_client, s3_endpoint):
+    reader = RemoteSceneReader(BlockDiskCache(str(tmp_path / 'block_cache')), aws_client=s3_client,
+                               endpoint_url=s3_endpoint, version_ttl=0)
+    yield reader
+    reader.close()
+
+
+def upload_scene(s3_client, tmp_path, key: str, **scene) -> str:
+    path = write_scene(tmp_path / key.replace('/', '_'), **scene)
+    s3_client.upload_file(str(path), BUCKET, key)
+    return str(path)
+
+
+def test_remote_paths():
+    assert is_remote('s3://bucket/scene.tif') and is_remote('https://host/scene.tif')
+    assert not is_remote('/data/scene.tif')
+    assert vsi_path('s3://bucket/a/scene.tif') == '/vsis3/bucket/a/scene.tif'
+    assert vsi_path('gs://bucket/scene.tif') == '/vsigs/bucket/scene.tif'
+    assert vsi_path('https://host/scene.tif') == '/vsicurl/https://host/scene.tif'
+
+
+def test_read_window_matches_local_read_and_reuses_cached_tiles(tmp_path, s3_client, reader):
+    local = upload_scene(s3_client, tmp_path, 'tiles/window.tif', size=128, block_size=32)
+    window = Window(10, 20, 50, 40)
+
+    remote = reader.read_window(f's3://{BUCKET}/tiles/window.tif', window)
+    with rasterio.open(local) as src:
+        expected = src.read(window=window)
+
+    np.testing.assert_array_equal(remote, expected)
+    # The window touches 2 x 2 internal tiles
+    assert reader.cache.stats()['misses'] == 4
+
+    again = reader.read_window(f's3://{BUCKET}/tiles/window.tif', window)
+    np.testing.assert_array_equal(again, expected)
+    assert reader.cache.stats()['hits'] == 4
+
+
+def test_read_clipped_matches_local_mask(tmp_path, s3_client, reader):
+    local = upload_scene(s3_client, tmp_path, 'tiles/clip.tif', size=128, block_size=32,
+                         nodata=0, nodata_fraction=0.05)
+    boundary = shape(farm_boundary(12, 7, 90, 100))
+
+    scene = reader.read_clipped(f's3://{BUCKET}/tiles/clip.tif', boundary)
+    with rasterio.open(local) as src:
+        masked, transform = mask(src, [boundary], crop=True, filled=False)
+
+    assert scene['transform'] == transform
+    np.testing.assert_array_equal(scene['valid'], ~np.ma.getmaskarray(masked).any(axis=0))
+    np.testing.assert_array_equal(scene['bands'][:, scene['valid']], masked.data[:, scene['valid']])
+
+
+def test_replaced_object_is_not_served_from_stale_blocks(tmp_path, s3_client, reader):
+    uri = f's3://{BUCKET}/tiles/replaced.tif'
+    window = Window(0, 0, 32, 32)
+    upload_scene(s3_client, tmp_path, 'tiles/replaced.tif', size=64, block_size=32, seed=1)
+    first = reader.read_window(uri, window)
+
+    local = upload_scene(s3_client, tmp_path, 'tiles/replaced.tif', size=64, block_size=32, seed=2)
+    second = reader.read_window(uri, window)
+
+    with rasterio.open(local) as src:
+        np.testing.assert_array_equal(second, src.read(window=window))
+    assert not np.array_equal(first, second)
+
+
+def test_reuploaded_scene_misses_index_caches_and_store(tmp_path, s3_client, reader, processor_config):
+    uri = f's3://{BUCKET}/tiles/indices.tif'
+    boundary = shape(farm_boundary(4, 4, 50, 50))
+    config = {**processor_config, 'index_store': {'enabled': True, 'root': str(tmp_path / 'index_rasters')}}
+    processor = SatelliteDataProcessor(config)
+    processor._remote_reader = reader
+    try:
+        upload_scene(s3_client, tmp_path, 'tiles/indices.tif', size=64, block_size=32, seed=1)
+        first = asyncio.run(processor._get_scene_indices(uri, boundary, ['ndvi']))['ndvi']
+        first_key = SceneCache.scene_key(uri, boundary, reader.version(uri))
+        assert processor.index_store.lookup(first_key) is not None
+
+        upload_scene(s3_client, tmp_path, 'tiles/indices.tif', size=64, block_size=32, seed=2)
+        second_key = SceneCache.scene_key(uri, boundary, reader.version(uri))
+        assert second_key != first_key
+        assert processor.index_store.lookup(second_key) is None
+        second = asyncio.run(processor._get_scene_indices(uri, boundary, ['ndvi']))['ndvi']
+    finally:
+        processor.shutdown()
+
+    assert not np.array_equal(first, second, equal_nan=True)
+    stored = processor.index_store.lookup(second_key)
+    assert stored['path'] != processor.index_store.lookup(first_key)['path']
+    np.testing.assert_array_equal(processor.index_store.read(stored['path'], ['ndvi'])['ndvi'], second)
+    with rasterio.open(stored['path']) as src:
+        assert src.tags()['source_version'] == second_key[1]
+
+
+def test_s3_indexed_catalogue_feeds_change_detection(tmp_path, s3_client, reader, processor_config):
+    for key, acquired, seed in (('history/old.tif', '2024-01-05', 1), ('history/new.tif', '2024-02-05', 2)):
+        path = write_scene(tmp_path / key.replace('/', '_'), size=64, block_size=32, seed=seed)
+        with rasterio.open(path, 'r+') as dst:
+            dst.update_tags(ACQUISITION_DATE=acquired)
+        s3_client.upload_file(str(path), BUCKET, key)
+    boundary = farm_boundary(4, 4, 50, 50)
+    processor = SatelliteDataProcessor(processor_config)
+    processor._remote_reader = reader
+    try:
+        counts = processor.scene_indexer.index_s3_prefix(s3_client, BUCKET, 'history/')
+        current = f's3://{BUCKET}/history/new.tif'
+        history = processor._query_historical_images(current, shape(boundary))
+        comparison = asyncio.run(processor._compare_images(current, history[0], boundary))
+    finally:
+        processor.shutdown()
+
+    assert counts['added'] == 2
+    assert history == [f's3://{BUCKET}/history/old.tif']
+    assert comparison is not None and comparison['aligned_pixels'] > 0
+    assert 'ndvi_change' in comparison['differences']
+
+
+def test_block_disk_cache_evicts_least_recent_and_survives_restart(tmp_path):
+    block = np.arange(256, dtype=np.uint16).reshape(1, 16, 16)
+    cache = BlockDiskCache(str(tmp_path / 'blocks'), max_bytes=10 ** 6)
+    cache.put('a', block)
+    entry_bytes = cache.stats()['bytes']
+
+    cache = BlockDiskCache(str(tmp_path / 'blocks'), max_bytes=2 * entry_bytes)
+    np.testing.assert_array_equal(cache.get('a'), block)
+    cache.put('b', block + 1)
+    cache.get('a')
+    cache.put('c', block + 2)
+
+    assert cache.get('b') is None
+    np.testing.assert_array_equal(cache.get('a'), block)
+    np.testing.assert_array_equal(cache.get('c'), block + 2)
+    assert cache.stats()['entries'] == 2
@@ -0,0 +1,199 @@
+"""
+Satellite Processor Tests
+Scene summaries, index persistence and concurrent processing of synthetic scenes
+"""
+
+import asyncio
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.windows import Window
+from shapely.geometry import shape
+
+from conftest import farm_boundary, write_scene
+from src.processors.raster_encoding import DEFAULT_RASTER_FORMAT, negotiate_raster_format
+from src.processors.satellite_processor import SatelliteDataProcessor
+from src.processors.scene_cache import SceneCache
+
+
+def make_processor(config, **executor):
+    config = {**config, 'processing': {'tiled': True, 'tile_size': 32}}
+    config['executor'] = {**config['executor'], **executor}
+    return SatelliteDataProcessor(config)
+
+
+def test_tiled_scenes_concurrently_on_thread_backend(tmp_path, processor_config):
+    scenes = [write_scene(tmp_path / f'scene_{seed}.tif', size=192, block_size=32, seed=seed) for seed in range(2)]
+    boundary = farm_boundary(10, 10, 170, 170)
+
+    serial = make_processor(processor_config)
+    concurrent = make_processor(processor_config, cpu_workers=4)
+    try:
+        expected = [asyncio.run(serial.process_satellite_image(str(path), boundary)) for path in scenes]
+
+        async def run_together():
+            return await asyncio.gather(*[
+                concurrent.process_satellite_image(str(path), boundary) for path in scenes for _ in range(2)
+            ])
+
+        results = asyncio.run(run_together())
+    finally:
+        serial.shutdown()
+        concurrent.shutdown()
+
+    for position, result in enumerate(results):
+        reference = expected[position // 2]
+        assert result['vegetation_indices'] == reference['vegetation_indices']
+        assert result['health_analysis'] == reference['health_analysis']
+
+
+
+def test_scene_batches_concurrently_on_thread_backend(tmp_path, processor_config):
+    gpd = pytest.importorskip('geopandas')
+
+    scenes = [write_scene(tmp_path / f'scene_{seed}.tif', size=192, block_size=32, seed=seed) for seed in range(2)]
+    farms = gpd.GeoDataFrame(
+        {'farm_id': ['north', 'south']},
+        geometry=[shape(farm_boundary(5, 5, 120, 80)), shape(farm_boundary(30, 100, 150, 85))],
+        crs='EPSG:32643'
+    )
+
+    serial = make_processor(processor_config)
+    concurrent = make_processor(processor_config, cpu_workers=4)
+    try:
+        expected = [asyncio.run(serial.process_scene_batch(str(path), farms, 'farm_id')) for path in scenes]
+
+        async def run_together():
+            return await asyncio.gather(*[
+                concurrent.process_scene_batch(str(path), farms, 'farm_id') for path in scenes for _ in range(2)
+            ])
+
+        results = asyncio.run(run_together())
+    finally:
+        serial.shutdown()
+        concurrent.shutdown()
+
+    for position, result in enumerate(results):
+        assert result == expected[position // 2]
+
+
+def test_in_memory_processing_persists_indices(tmp_path, processor_config):
+    path = str(write_scene(tmp_path / 'scene.tif', size=96, block_size=32))
+    boundary = farm_boundary(5, 5, 80, 80)
+    config = {**processor_config, 'index_store': {'enabled': True, 'root': str(tmp_path / 'index_rasters')}}
+
+    processor = SatelliteDataProcessor(config)
+    try:
+        result = asyncio.run(processor.process_satellite_image(path, boundary, indices=['ndvi', 'evi']))
+        stored = processor.index_store.lookup(SceneCache.scene_key(path, shape(boundary)))
+    finally:
+        processor.shutdown()
+
+    assert stored is not None
+    assert set(stored['indices']) == {'ndvi', 'evi'}
+    persisted = processor.index_store.read(stored['path'], ['ndvi'])['ndvi']
+    np.testing.assert_allclose(persisted, result['vegetation_indices']['ndvi'], equal_nan=True)
+
+
+def test_scene_rewritten_in_place_is_reindexed(tmp_path, processor_config):
+    path = write_scene(tmp_path / 'scene.tif', size=32, block_size=16)
+    processor = SatelliteDataProcessor(processor_config)
+    try:
+        for stamp, acquired in ((10 ** 9, '2024-01-05'), (2 * 10 ** 9, '2024-03-05')):
+            with rasterio.open(path, 'r+') as dst:
+                dst.update_tags(ACQUISITION_DATE=acquired)
+            os.utime(path, ns=(stamp, stamp))
+            record = processor._catalog_scene(str(path))
+            assert record['acquired_at'] == datetime.fromisoformat(acquired)
+    finally:
+        processor.shutdown()
+
+    assert len(processor.scene_catalog) == 1
+
+
+def test_index_reads_check_memory_before_the_store(tmp_path, processor_config, monkeypatch):
+    path = str(write_scene(tmp_path / 'scene.tif', size=96, block_size=32))
+    boundary = farm_boundary(5, 5, 80, 80)
+    config = {**processor_config, 'index_store': {'enabled': True, 'root': str(tmp_path / 'index_rasters')}}
+
+    processor = SatelliteDataProcessor(config)
+    lookups = []
+    lookup = processor.index_store.lookup
+    monkeypatch.setattr(processor.index_store, 'lookup', lambda key: lookups.append(key) or lookup(key))
+    try:
+        asyncio.run(processor.process_satellite_image(path, boundary, indices=['ndvi']))
+        first_pass = len(lookups)
+        for _ in range(3):
+            asyncio.run(processor.read_index_window(path, boundary, ['ndvi'], Window(0, 0, 16, 16)))
+        asyncio.run(processor.process_satellite_image(path, boundary, indices=['ndvi']))
+    finally:
+        processor.shutdown()
+
+    # Only the first computation consults the store; later reads are served from memory
+    assert first_pass == 1
+    assert len(lookups) == first_pass
+
+
+def test_tiled_batch_and_in_memory_statistics_agree_with_nodata(tmp_path, processor_config):
+    gpd = pytest.importorskip('geopandas')
+
+    path = str(write_scene(tmp_path / 'scene.tif', size=160, block_size=32, nodata=0, nodata_fraction=0.1))
+    boundary = farm_boundary(7, 9, 140, 130)
+    farms = gpd.GeoDataFrame({'farm_id': ['farm']}, geometry=[shape(boundary)], crs='EPSG:32643')
+
+    tiled = make_processor(processor_config)
+    in_memory = SatelliteDataProcessor(processor_config)
+    try:
+        memory_result = asyncio.run(in_memory.process_satellite_image(path, boundary, tiled=False))
+        summaries = [
+            asyncio.run(tiled.process_satellite_image(path, boundary)),
+            asyncio.run(tiled.process_scene_batch(path, farms, 'farm_id'))['farm'],
+        ]
+    finally:
+        tiled.shutdown()
+        in_memory.shutdown()
+
+    for summary in summaries:
+        for name, stats in summary['vegetation_indices'].items():
+            values = memory_result['vegetation_indices'][name]
+            values = values[np.isfinite(values)]
+            assert stats['pixel_count'] == values.size
+            assert stats['mean'] == pytest.approx(float(values.mean()), rel=1e-5)
+            assert stats['min'] == pytest.approx(float(values.min()))
+            assert stats['max'] == pytest.approx(float(values.max()))
+        assert summary['health_analysis']['health_metrics'] == \
+            pytest.approx(memory_result['health_analysis']['health_metrics'])
+
+
+def test_in_memory_cpu_stages_do_not_ship_the_processor(tmp_path, processor_config, monkeypatch):
+    path = str(write_scene(tmp_path / 'scene.tif', size=96, block_size=32))
+    boundary = farm_boundary(5, 5, 80, 80)
+
+    def refuse_pickling(self):
+        raise AssertionError("SatelliteDataProcessor was pickled for a CPU stage")
+
+    monkeypatch.setattr(SatelliteDataProcessor, '__getstate__', refuse_pickling)
+    processor = make_processor(processor_config, cpu_backend='process', cpu_workers=1)
+    try:
+        result = asyncio.run(processor.process_satellite_image(path, boundary, tiled=False))
+    finally:
+        processor.shutdown()
+
+    assert result['management_zones']['status'] == 'completed'
+    assert result['health_analysis']['health_metrics']['vegetation_coverage'] >= 0
+
+
+def test_unrequested_zone_map_format_matches_negotiated_default(tmp_path, processor_config):
+    path = str(write_scene(tmp_path / 'scene.tif', size=96, block_size=32))
+    processor = SatelliteDataProcessor(processor_config)
+    try:
+        result = asyncio.run(processor.process_satellite_image(path, farm_boundary(5, 5, 80, 80), tiled=False))
+    finally:
+        processor.shutdown()
+
+    zone_map = result['management_zones']['zone_map']
+    assert zone_map['format'] == negotiate_raster_format(None) == DEFAULT_RASTER_FORMAT
+    assert sum(zone_map['counts']) == np.prod(zone_map['shape'])
@@ -0,0 +1,81 @@
+"""
+Scene Cache Tests
+Byte-bounded LRU eviction, read-only entries and deduplicated async computation
+"""
+
+import asyncio
+import os
+
+import numpy as np
+from shapely.geometry import box
+
+from src.processors.scene_cache import SceneCache
+
+
+def array(n_bytes: int) -> np.ndarray:
+    return np.zeros(n_bytes, dtype=np.uint8)
+
+
+def test_evicts_least_recently_used_entries_by_bytes():
+    cache = SceneCache(max_bytes=300)
+    cache.put('a', array(100))
+    cache.put('b', {'ndvi': array(100)})
+    cache.put('c', [array(50), array(50)])
+    cache.get('a')
+    cache.put('d', array(100))
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None and cache.get('d') is not None
+    assert cache.stats()['bytes'] == 300
+
+
+def test_entries_larger_than_the_budget_are_returned_but_not_cached():
+    cache = SceneCache(max_bytes=100)
+    value = cache.put('big', array(101))
+
+    assert value.nbytes == 101
+    assert cache.get('big') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_cached_arrays_are_read_only():
+    cache = SceneCache()
+    indices = cache.put('indices', {'ndvi': np.ones((4, 4), dtype=np.float32)})
+
+    assert not indices['ndvi'].flags.writeable
+
+
+def test_get_or_compute_async_runs_concurrent_misses_once():
+    cache = SceneCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return array(10)
+
+    async def run():
+        return await asyncio.gather(*[cache.get_or_compute_async('key', compute) for _ in range(5)])
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert cache.get_or_compute('key', lambda: array(1)) is results[0]
+
+
+def test_scene_key_follows_file_version_and_boundary(tmp_path):
+    path = tmp_path / 'scene.tif'
+    path.write_bytes(b'first')
+    boundary = box(0, 0, 10, 10)
+    key = SceneCache.scene_key(str(path), boundary)
+
+    assert SceneCache.scene_key(str(path), boundary) == key
+    assert SceneCache.scene_key(str(path), box(0, 0, 10, 11)) != key
+
+    path.write_bytes(b'second version')
+    os.utime(path, ns=(0, 10 ** 9))
+    assert SceneCache.scene_key(str(path), boundary) != key
+
+    assert SceneCache.index_key(key, ['ndvi', 'evi']) == SceneCache.index_key(key, ['evi', 'ndvi'])
+    assert SceneCache.scene_key('s3://bucket/scene.tif', boundary)[:3] == ('s3://bucket/scene.tif', None, None)
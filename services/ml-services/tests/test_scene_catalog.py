@@ -0,0 +1,129 @@
+"""
+Scene Catalogue Tests
+Spatio-temporal lookups and incremental directory indexing
+"""
+
+import os
+from datetime import datetime
+
+import pytest
+import rasterio
+from shapely.geometry import Polygon, box
+
+from conftest import write_scene
+from src.processors.scene_catalog import SceneCatalog, SceneIndexer, geometry_to_catalog_crs, read_scene_metadata
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = SceneCatalog(str(tmp_path / 'catalog.sqlite'))
+    yield catalog
+    catalog.close()
+
+
+def scene(path: str, day: int, footprint=None, cloud_fraction=None, sensor='sentinel-2'):
+    return {
+        'path': path,
+        'acquired_at': datetime(2024, 3, day, 5, 30),
+        'sensor': sensor,
+        'cloud_fraction': cloud_fraction,
+        'crs': 'EPSG:32643',
+        'footprint': footprint if footprint is not None else box(75.0, 18.0, 75.1, 18.1),
+        'version': '1',
+    }
+
+
+def test_find_overlapping_returns_newest_first_within_bounds(catalog):
+    for day in (1, 5, 10, 15):
+        catalog.upsert(scene(f'/scenes/{day}.tif', day))
+    catalog.upsert(scene('/scenes/elsewhere.tif', 12, footprint=box(80.0, 20.0, 80.1, 20.1)))
+    field = box(75.02, 18.02, 75.03, 18.03)
+
+    paths = [record['path'] for record in catalog.find_overlapping(field)]
+    assert paths == ['/scenes/15.tif', '/scenes/10.tif', '/scenes/5.tif', '/scenes/1.tif']
+
+    before = catalog.find_overlapping(field, before=datetime(2024, 3, 10, 5, 30), limit=1)
+    assert [record['path'] for record in before] == ['/scenes/5.tif']
+
+    after = catalog.find_overlapping(field, after=datetime(2024, 3, 5, 5, 30), exclude=['/scenes/15.tif'])
+    assert [record['path'] for record in after] == ['/scenes/10.tif']
+    assert after[0]['footprint'].equals(box(75.0, 18.0, 75.1, 18.1))
+
+
+def test_find_overlapping_filters_cloud_sensor_and_exact_footprint(catalog):
+    # Triangle whose bounding box covers the field but whose footprint does not
+    triangle = Polygon([(75.0, 18.0), (75.1, 18.0), (75.0, 18.1)])
+    catalog.upsert(scene('/scenes/triangle.tif', 3, footprint=triangle))
+    catalog.upsert(scene('/scenes/cloudy.tif', 4, cloud_fraction=0.8))
+    catalog.upsert(scene('/scenes/unknown_cloud.tif', 5))
+    catalog.upsert(scene('/scenes/landsat.tif', 6, cloud_fraction=0.1, sensor='landsat-9'))
+    field = box(75.08, 18.08, 75.09, 18.09)
+
+    clear = catalog.find_overlapping(field, max_cloud_fraction=0.3)
+    assert [record['path'] for record in clear] == ['/scenes/landsat.tif', '/scenes/unknown_cloud.tif']
+
+    sentinel = catalog.find_overlapping(field, sensor='sentinel-2')
+    assert [record['path'] for record in sentinel] == ['/scenes/unknown_cloud.tif', '/scenes/cloudy.tif']
+
+
+def test_upsert_replaces_and_remove_drops_scenes(catalog):
+    catalog.upsert(scene('/scenes/a.tif', 1))
+    catalog.upsert(scene('/scenes/a.tif', 20))
+
+    assert len(catalog) == 1
+    assert catalog.get('/scenes/a.tif')['acquired_at'] == '2024-03-20T05:30:00'
+    assert catalog.find_overlapping(box(75.01, 18.01, 75.02, 18.02), before=datetime(2024, 3, 10)) == []
+
+    assert catalog.remove(['/scenes/a.tif', '/scenes/missing.tif']) == 1
+    assert len(catalog) == 0
+
+
+def test_read_scene_metadata_from_tags_and_filename(tmp_path):
+    tagged = write_scene(tmp_path / 'tagged.tif', size=32, block_size=16)
+    with rasterio.open(tagged, 'r+') as dst:
+        dst.update_tags(ACQUISITION_DATE='2024-02-01T10:20:30', SPACECRAFT_NAME='Sentinel-2B',
+                        CLOUDY_PIXEL_PERCENTAGE='12.5')
+    named = write_scene(tmp_path / 'LC09_L2SP_146040_20240302_20240303_02_T1.tif', size=32, block_size=16)
+
+    tagged_meta = read_scene_metadata(str(tagged))
+    assert tagged_meta['acquired_at'] == datetime(2024, 2, 1, 10, 20, 30)
+    assert tagged_meta['sensor'] == 'sentinel-2b'
+    assert tagged_meta['cloud_fraction'] == pytest.approx(0.125)
+    assert tagged_meta['footprint'].bounds[0] == pytest.approx(75.0, abs=0.5)
+
+    named_meta = read_scene_metadata(str(named))
+    assert named_meta['acquired_at'] == datetime(2024, 3, 2)
+    assert named_meta['sensor'] == 'landsat-9'
+    assert named_meta['cloud_fraction'] is None
+
+
+def test_index_directory_is_incremental(tmp_path, catalog):
+    root = tmp_path / 'scenes'
+    root.mkdir()
+    first = write_scene(root / 'S2A_MSIL2A_20240301T052651.tif', size=32, block_size=16)
+    second = write_scene(root / 'S2A_MSIL2A_20240311T052651.tif', size=32, block_size=16)
+    (root / 'notes.txt').write_text('not a scene')
+    (root / 'broken.tif').write_bytes(b'not a tiff')
+    indexer = SceneIndexer(catalog)
+
+    assert indexer.index_directory(str(root)) == \
+        {'added': 2, 'updated': 0, 'unchanged': 0, 'failed': 1, 'removed': 0}
+
+    write_scene(second, size=32, block_size=16, seed=1)
+    os.utime(second, ns=(0, 10 ** 9))
+    os.remove(first)
+    (root / 'broken.tif').unlink()
+
+    assert indexer.index_directory(str(root)) == \
+        {'added': 0, 'updated': 1, 'unchanged': 0, 'failed': 0, 'removed': 1}
+    assert indexer.index_directory(str(root))['unchanged'] == 1
+    assert [record['path'] for record in catalog.find_overlapping(box(-180, -90, 180, 90))] == [str(second)]
+
+
+def test_geometry_to_catalog_crs_reprojects_projected_boundaries():
+    utm = box(500000, 2000000, 501000, 2001000)
+
+    lon_lat = geometry_to_catalog_crs(utm, 'EPSG:32643')
+
+    assert lon_lat.bounds[0] == pytest.approx(75.0, abs=0.01)
+    assert geometry_to_catalog_crs(utm, None) is utm
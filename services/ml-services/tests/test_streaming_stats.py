@@ -0,0 +1,81 @@
+"""
+Streaming Statistics Tests
+Window-by-window reducers agree with whole-array NumPy statistics
+"""
+
+import numpy as np
+import pytest
+
+from src.processors.streaming_stats import GroupedStatistics, RunningStatistics
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(0).normal(0.4, 0.2, size=10_000).astype(np.float32)
+
+
+def test_running_statistics_over_chunks_match_numpy(values):
+    stats = RunningStatistics()
+    for chunk in np.array_split(values, 17):
+        stats.update(chunk)
+    stats.update(values[:0])
+
+    assert stats.count == values.size
+    assert stats.mean == pytest.approx(values.mean(dtype=np.float64))
+    assert stats.std == pytest.approx(values.std(dtype=np.float64))
+    assert stats.to_dict() == {'mean': pytest.approx(stats.mean), 'std': stats.std,
+                               'min': float(values.min()), 'max': float(values.max())}
+
+
+def test_running_statistics_merge_matches_single_pass(values):
+    left, right, whole = RunningStatistics(), RunningStatistics(), RunningStatistics()
+    left.update(values[:3000])
+    right.update(values[3000:])
+    whole.update(values)
+
+    left.merge(right)
+    left.merge(RunningStatistics())
+
+    assert left.count == whole.count
+    assert left.mean == pytest.approx(whole.mean)
+    assert left.variance == pytest.approx(whole.variance)
+    assert (left.min, left.max) == (whole.min, whole.max)
+
+
+def test_empty_running_statistics_have_zero_variance():
+    assert RunningStatistics().variance == 0.0
+
+
+def test_grouped_statistics_match_per_group_numpy(values):
+    groups = np.random.default_rng(1).integers(0, 3, size=values.size)
+    stats = GroupedStatistics(4)
+    for chunk in np.array_split(np.arange(values.size), 5):
+        stats.update(groups[chunk], values[chunk])
+
+    for group in range(3):
+        members = values[groups == group].astype(np.float64)
+        summary = stats.to_dict(group)
+        assert stats.count[group] == members.size
+        assert summary['mean'] == pytest.approx(members.mean())
+        assert summary['std'] == pytest.approx(members.std(), rel=1e-4)
+        assert (summary['min'], summary['max']) == (members.min(), members.max())
+
+    # Groups that never received values stay empty
+    assert stats.count[3] == 0
+    assert stats.to_running(3).count == 0
+
+
+def test_grouped_statistics_merge(values):
+    groups = np.arange(values.size) % 2
+    first, second, whole = GroupedStatistics(2), GroupedStatistics(2), GroupedStatistics(2)
+    first.update(groups[:5000], values[:5000])
+    second.update(groups[5000:], values[5000:])
+    whole.update(groups, values)
+
+    first.merge(second)
+
+    np.testing.assert_array_equal(first.count, whole.count)
+    np.testing.assert_allclose(first.mean, whole.mean)
+    np.testing.assert_allclose(first.variance, whole.variance)
+    np.testing.assert_array_equal(first.min, whole.min)
+    np.testing.assert_array_equal(first.max, whole.max)
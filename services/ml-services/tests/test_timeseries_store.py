@@ -0,0 +1,106 @@
+"""
+Time-Series Store Tests
+Memory-mapped per-farm cubes: appends, growth, reopening, multi-process writers and trend analysis
+"""
+
+import multiprocessing
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from src.processors.timeseries_store import FarmTimeSeries, TimeSeriesStore, anomalies, seasonality, trend
+
+
+def summary(mean: float) -> dict:
+    return {'ndvi': {'mean': mean, 'std': 0.1, 'min': mean - 0.2, 'max': mean + 0.2, 'pixel_count': 100}}
+
+
+def test_reads_are_chronological_and_same_date_replaces(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), indices=['ndvi', 'evi'])
+    store.append('farm/1', date(2024, 3, 10), summary(0.5))
+    store.append('farm/1', '2024-03-01', summary(0.4))
+    store.append('farm/1', date(2024, 3, 10), summary(0.6))
+
+    dates, values = store.series('farm/1').read(['ndvi'], ['mean', 'pixel_count'])
+
+    assert dates.tolist() == [date(2024, 3, 1), date(2024, 3, 10)]
+    np.testing.assert_allclose(values[:, 0, 0], [0.4, 0.6])
+    np.testing.assert_array_equal(values[:, 0, 1], [100, 100])
+    # Indices missing from a summary are stored as NaN
+    assert np.isnan(store.series('farm/1').read(['evi'])[1]).all()
+    assert (tmp_path / 'farm_1').is_dir()
+
+
+def test_grows_past_capacity_and_reopens_from_disk(tmp_path):
+    series = FarmTimeSeries(tmp_path / 'farm', ['ndvi'], ['mean'], initial_capacity=2)
+    start = date(2024, 1, 1)
+    for day in range(5):
+        series.append(start + timedelta(days=day), {'ndvi': {'mean': day / 10}})
+
+    assert series.capacity == 8
+    reopened = FarmTimeSeries(tmp_path / 'farm', ['ignored'], ['ignored'])
+    assert reopened.indices == ['ndvi'] and reopened.shape == (5, 1, 1)
+
+    dates, values = reopened.read(start=start + timedelta(days=1), end=start + timedelta(days=3))
+    assert len(dates) == 3
+    np.testing.assert_allclose(values[:, 0, 0], [0.1, 0.2, 0.3])
+
+
+def append_days(directory, first_day: int, count: int):
+    series = FarmTimeSeries(directory, ['ndvi'], ['mean'], initial_capacity=2)
+    for day in range(first_day, first_day + count):
+        series.append(date(2020, 1, 1) + timedelta(days=day), {'ndvi': {'mean': day}})
+
+
+def test_concurrent_processes_append_without_losing_rows(tmp_path):
+    context = multiprocessing.get_context('fork')
+    writers = [context.Process(target=append_days, args=(tmp_path / 'farm', worker * 40, 40)) for worker in range(4)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    assert [writer.exitcode for writer in writers] == [0] * 4
+
+    dates, values = FarmTimeSeries(tmp_path / 'farm', ['ndvi'], ['mean']).read()
+
+    assert dates.tolist() == [date(2020, 1, 1) + timedelta(days=day) for day in range(160)]
+    np.testing.assert_array_equal(values[:, 0, 0], np.arange(160))
+
+
+def test_analyze_reports_trend_seasonality_and_anomalies(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    start = date(2023, 1, 1)
+    for step in range(24):
+        mean = 0.3 + 0.01 * step + (0.4 if step == 20 else 0.0)
+        store.append('farm', start + timedelta(days=30 * step), summary(mean))
+
+    analysis = store.analyze('farm', trend_threshold=0.005)
+
+    assert analysis['status'] == 'completed'
+    assert analysis['observations'] == 24
+    assert analysis['trend']['trend_direction'] == 'improving'
+    assert [anomaly['date'] for anomaly in analysis['anomalies']] == [str(start + timedelta(days=600))]
+    assert sum(analysis['seasonality']['monthly_count']) == 24
+
+
+def test_analyze_needs_two_observations(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    store.append('farm', date(2024, 1, 1), summary(0.5))
+
+    assert store.analyze('farm') == {'status': 'insufficient_data', 'observations': 1}
+
+
+def test_trend_and_seasonality_helpers():
+    dates = np.array(['2024-01-15', '2024-02-14', '2024-03-15', '2024-04-14'], dtype='datetime64[D]')
+    values = np.array([0.2, 0.3, 0.4, 0.5])
+
+    result = trend(dates, values, threshold=0.05)
+    assert result['trend_direction'] == 'improving'
+    assert result['trend_slope'] == pytest.approx(0.1, rel=0.05)
+
+    season = seasonality(dates, values)
+    assert season['monthly_count'][:4] == [1, 1, 1, 1]
+    assert season['peak_month'] == 4
+    assert season['amplitude'] == pytest.approx(0.3)
+    assert anomalies(dates, values, z_threshold=3.0) == []
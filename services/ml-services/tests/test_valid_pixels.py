@@ -0,0 +1,56 @@
+"""
+Valid Pixel Tests
+Compressing rasters to their valid pixels and scattering results back onto the grid
+"""
+
+import numpy as np
+import pytest
+
+from src.processors.valid_pixels import ValidPixels
+
+
+@pytest.fixture
+def valid_mask():
+    mask = np.zeros((4, 5), dtype=bool)
+    mask[1:3, 1:4] = True
+    mask[3, 0] = True
+    return mask
+
+
+def test_from_mask_round_trips(valid_mask):
+    valid = ValidPixels.from_mask(valid_mask)
+
+    assert valid.shape == (4, 5)
+    assert valid.count == 7
+    np.testing.assert_array_equal(valid.mask, valid_mask)
+
+
+def test_compress_raster_and_band_stack(valid_mask):
+    valid = ValidPixels.from_mask(valid_mask)
+    raster = np.arange(20).reshape(4, 5)
+    stack = np.stack([raster, raster * 10])
+
+    np.testing.assert_array_equal(valid.compress(raster), raster[valid_mask])
+    compressed = valid.compress(stack)
+    assert compressed.shape == (2, 7)
+    np.testing.assert_array_equal(compressed[1], raster[valid_mask] * 10)
+
+
+def test_scatter_fills_invalid_pixels(valid_mask):
+    valid = ValidPixels.from_mask(valid_mask)
+    values = np.arange(7, dtype=np.float32)
+
+    raster = valid.scatter(values)
+    assert raster.dtype == np.float32
+    np.testing.assert_array_equal(raster[valid_mask], values)
+    assert np.isnan(raster[~valid_mask]).all()
+
+    labels = valid.scatter(np.arange(7, dtype=np.int32), fill=-1)
+    assert (labels[~valid_mask] == -1).all()
+
+
+def test_compress_rejects_a_different_grid(valid_mask):
+    valid = ValidPixels.from_mask(valid_mask)
+
+    with pytest.raises(ValueError):
+        valid.compress(np.zeros((5, 4)))